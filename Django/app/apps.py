@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class TasksConfig(AppConfig):
+    """
+    Конфигурация приложения задач.
+    """
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'app'
+
+    def ready(self):
+        # Подключение обработчиков сигналов, сбрасывающих кэш панели управления.
+        from app import signals  # noqa: F401
+        # Подключение учёта SQL-запросов для метрик Prometheus.
+        from app import metrics  # noqa: F401
+        # Проверка общего кэша для manage.py check --deploy.
+        from app import checks  # noqa: F401
@@ -0,0 +1,114 @@
+from asgiref.sync import sync_to_async
+from django.contrib import auth
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.shortcuts import render, redirect
+from django.template.loader import render_to_string
+
+from app.cache import DASHBOARD_CACHE_TIMEOUT, adashboard_cache_key
+from app.categories import category_registry
+from app.forms import TaskForm
+from app.models import Task
+from app.pagination import akeyset_paginate
+from app.views import DASHBOARD_PAGE_SIZE
+
+
+async def get_user(request):
+    """
+    Асинхронно возвращает пользователя запроса.
+    """
+    if hasattr(request, 'auser'):
+        return await request.auser()
+    return await sync_to_async(auth.get_user)(request)
+
+
+async def aget_task_or_404(user, task_id):
+    """
+    Асинхронно возвращает задачу пользователя или вызывает Http404.
+    """
+    try:
+        return await Task.objects.aget(id=task_id, user=user)
+    except Task.DoesNotExist:
+        raise Http404('No Task matches the given query.')
+
+
+# Form validation and template rendering may query the database (unique checks,
+# the category registry, context processors), so they run in the sync thread
+@sync_to_async
+def avalidate(form):
+    """
+    Асинхронно проверяет данные формы.
+    """
+    return form.is_valid()
+
+
+arender = sync_to_async(render)
+arender_to_string = sync_to_async(render_to_string)
+
+
+async def add_task(request):
+    """
+    Асинхронное представление для добавления новой задачи.
+    """
+    user = await get_user(request)
+    categories = await category_registry.aall()
+    if request.method == 'POST':
+        form = TaskForm(request.POST)
+        if await avalidate(form):
+            task = form.save(commit=False)
+            task.user = user
+            await task.asave()
+            return redirect('dashboard')
+    else:
+        form = TaskForm()
+    return await arender(request, 'add_task.html', {'form': form, 'categories': categories})
+
+
+async def edit_task(request, task_id):
+    """
+    Асинхронное представление для редактирования существующей задачи.
+    """
+    user = await get_user(request)
+    task = await aget_task_or_404(user, task_id)
+    if request.method == 'POST':
+        form = TaskForm(request.POST, instance=task)
+        if await avalidate(form):
+            await form.save(commit=False).asave()
+            return redirect('dashboard')
+    else:
+        form = TaskForm(instance=task)
+    return await arender(request, 'edit_task.html', {'form': form, 'task': task})
+
+
+async def dashboard(request):
+    """
+    Асинхронное представление для отображения панели управления пользователя.
+    Отрисованная страница кэшируется до изменения задач пользователя или категорий.
+    """
+    user = await get_user(request)
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    cache_key = await adashboard_cache_key(user.id, after, before)
+    content = await cache.aget(cache_key)
+    if content is None:
+        tasks = await akeyset_paginate(
+            Task.objects.filter(user=user).select_related('category'),
+            after=after,
+            before=before,
+            page_size=DASHBOARD_PAGE_SIZE,
+        )
+        content = await arender_to_string('dashboard.html', {'tasks': tasks, 'user': user}, request)
+        await cache.aset(cache_key, content, DASHBOARD_CACHE_TIMEOUT)
+    return HttpResponse(content)
+
+
+async def delete_task(request, task_id):
+    """
+    Асинхронное представление для удаления существующей задачи.
+    """
+    user = await get_user(request)
+    task = await aget_task_or_404(user, task_id)
+    if request.method == 'POST':
+        await task.adelete()
+        return redirect('dashboard')
+    return await arender(request, 'delete_task.html', {'task': task})
@@ -0,0 +1,71 @@
+import uuid
+
+from django.core.cache import cache
+
+DASHBOARD_CACHE_TIMEOUT = 300
+CATEGORY_VERSION_KEY = 'version:categories'
+
+
+def user_version_key(user_id):
+    """
+    Ключ кэша с версией задач пользователя.
+    """
+    return f'version:tasks:{user_id}'
+
+
+def get_version(key):
+    """
+    Возвращает текущую метку версии, создавая её при отсутствии в кэше.
+    """
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+async def aget_version(key):
+    """
+    Асинхронный вариант get_version().
+    """
+    version = await cache.aget(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not await cache.aadd(key, version, None):
+            version = await cache.aget(key, version)
+    return version
+
+
+def bump_version(key):
+    """
+    Выдаёт новую метку версии. Все записи кэша, построенные на старой метке,
+    становятся недостижимыми и вытесняются по таймауту.
+    """
+    cache.set(key, uuid.uuid4().hex, None)
+
+
+def dashboard_cache_key(user_id, after=None, before=None):
+    """
+    Ключ кэша отрисованной страницы панели управления пользователя.
+    """
+    return 'dashboard:{}:{}:{}:{}:{}'.format(
+        user_id,
+        get_version(user_version_key(user_id)),
+        get_version(CATEGORY_VERSION_KEY),
+        after or '',
+        before or '',
+    )
+
+
+async def adashboard_cache_key(user_id, after=None, before=None):
+    """
+    Асинхронный вариант dashboard_cache_key().
+    """
+    return 'dashboard:{}:{}:{}:{}:{}'.format(
+        user_id,
+        await aget_version(user_version_key(user_id)),
+        await aget_version(CATEGORY_VERSION_KEY),
+        after or '',
+        before or '',
+    )
@@ -0,0 +1,81 @@
+import threading
+import time
+
+from django.conf import settings
+
+from app.cache import CATEGORY_VERSION_KEY, aget_version, get_version
+from app.models import Category
+
+
+class CategoryRegistry:
+    """
+    Реестр категорий, загружаемый один раз на процесс.
+
+    Актуальность проверяется по метке версии категорий в кэше: её обновляют
+    обработчики сигналов при сохранении или удалении категории, поэтому все
+    рабочие процессы с общим кэшем сразу перечитывают справочник. Кроме того,
+    справочник перечитывается не реже раза в ttl секунд (CATEGORY_REGISTRY_TTL):
+    с кэшем в памяти процесса метки других процессов сюда не доходят.
+    """
+
+    def __init__(self, ttl=None):
+        self._lock = threading.Lock()
+        self._ttl = ttl
+        self._version = None
+        self._loaded_at = 0.0
+        self._categories = {}
+
+    def _stale(self, version):
+        ttl = settings.CATEGORY_REGISTRY_TTL if self._ttl is None else self._ttl
+        return version != self._version or time.monotonic() - self._loaded_at > ttl
+
+    def _load(self):
+        version = get_version(CATEGORY_VERSION_KEY)
+        if self._stale(version):
+            with self._lock:
+                if self._stale(version):
+                    self._categories = {category.pk: category for category in Category.objects.order_by('pk')}
+                    self._version = version
+                    self._loaded_at = time.monotonic()
+        return self._categories
+
+    async def aload(self):
+        """
+        Асинхронно загружает справочник, если его версия устарела.
+        """
+        version = await aget_version(CATEGORY_VERSION_KEY)
+        if self._stale(version):
+            categories = {category.pk: category async for category in Category.objects.order_by('pk')}
+            with self._lock:
+                self._categories = categories
+                self._version = version
+                self._loaded_at = time.monotonic()
+        return self._categories
+
+    def invalidate(self):
+        """
+        Помечает справочник устаревшим: он будет перечитан при следующем обращении.
+        """
+        with self._lock:
+            self._version = None
+
+    async def aall(self):
+        """
+        Асинхронный вариант all().
+        """
+        return list((await self.aload()).values())
+
+    def all(self):
+        """
+        Возвращает список всех категорий.
+        """
+        return list(self._load().values())
+
+    def get(self, pk):
+        """
+        Возвращает категорию по первичному ключу или None.
+        """
+        return self._load().get(pk)
+
+
+category_registry = CategoryRegistry()
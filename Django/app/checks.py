@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Предупреждает, что метки версий кэша не разделяются между рабочими процессами,
+    если кэш по умолчанию хранится в памяти процесса.
+    """
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            'Кэш по умолчанию хранится в памяти процесса: изменения задач и категорий '
+            'не сбрасывают кэш и реестр категорий других рабочих процессов.',
+            hint='Задайте общий кэш, например каталог в переменной окружения DJANGO_CACHE_DIR.',
+            id='app.W001',
+        )
+    ]
@@ -1,14 +1,63 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from app.categories import category_registry
 from app.models import Task, Category
 
+
+class CategoryChoiceIterator(forms.models.ModelChoiceIterator):
+    """
+    Итератор вариантов выбора категории по реестру категорий процесса.
+    """
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for category in category_registry.all():
+            yield self.choice(category)
+
+    def __len__(self):
+        return len(category_registry.all()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(category_registry.all())
+
+
+class CategoryChoiceField(forms.ModelChoiceField):
+    """
+    Поле выбора категории, которое берёт варианты и проверяет значение
+    по реестру категорий процесса. Категория, которой ещё нет в реестре
+    (создана в другом процессе), ищется в базе данных.
+    """
+    iterator = CategoryChoiceIterator
+
+    def __init__(self, **kwargs):
+        super().__init__(queryset=Category.objects.all(), **kwargs)
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+        category = category_registry.get(pk)
+        if category is None:
+            category = Category.objects.filter(pk=pk).first()
+            if category is None:
+                raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+            # The registry missed a category added elsewhere, it is reloaded on next use
+            category_registry.invalidate()
+        return category
+
+
 class TaskForm(forms.ModelForm):
     """
     Форма для создания и редактирования задачи.
     """
-    category = forms.ModelChoiceField(queryset=Category.objects.all())
+    category = CategoryChoiceField()
     data_end_plan = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
     data_end = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}), required=False)
 
     class Meta:
         model = Task
-        fields = ['name', 'description', 'category', 'data_end_plan', 'status', 
+        fields = ['name', 'description', 'category', 'data_end_plan', 'status', 'data_end']
@@ -0,0 +1,100 @@
+import random
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from app.models import Task, Category
+from common import weights
+
+
+def parse_weights(value):
+    """
+    Разбирает распределение статусов вида 'planned=5,in_progress=3,completed=2'.
+    """
+    try:
+        return weights.parse_weights(value, dict(Task.STATUS_CHOICES))
+    except ValueError as error:
+        raise CommandError(str(error))
+
+
+class Command(BaseCommand):
+    """
+    Генерирует N пользователей по M задач для нагрузочного тестирования.
+    """
+    help = 'Генерирует синтетических пользователей и задачи пакетными вставками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Количество пользователей.')
+        parser.add_argument('--tasks-per-user', type=int, default=1000, help='Количество задач на пользователя.')
+        parser.add_argument('--categories', type=int, default=10, help='Количество категорий.')
+        parser.add_argument('--statuses', default='planned=5,in_progress=3,completed=2',
+                            help='Распределение статусов задач (веса).')
+        parser.add_argument('--category-skew', type=float, default=1.0,
+                            help='Показатель Ципфа для распределения задач по категориям (0 - равномерно).')
+        parser.add_argument('--deadline-days', type=int, default=90,
+                            help='Разброс плановых дат завершения относительно текущей даты, в днях.')
+        parser.add_argument('--seed', type=int, default=42, help='Начальное значение генератора случайных чисел.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Количество строк в одной транзакции.')
+        parser.add_argument('--prefix', default='loaduser', help='Префикс имён создаваемых пользователей.')
+        parser.add_argument('--password', default='testpassword', help='Пароль создаваемых пользователей.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        weights = parse_weights(options['statuses'])
+        batch_size = options['batch_size']
+        prefix = options['prefix']
+
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(f'Пользователи с префиксом {prefix!r} уже существуют, укажите другой --prefix.')
+
+        with transaction.atomic():
+            categories = Category.objects.bulk_create(
+                Category(name=f'{prefix} категория {i + 1}') for i in range(options['categories'])
+            )
+        category_weights = [1 / (rank + 1) ** options['category_skew'] for rank in range(len(categories))]
+
+        # Хеш пароля вычисляется один раз: PBKDF2 на каждого пользователя занял бы больше времени, чем вставка.
+        password = make_password(options['password'])
+        users = iter(User(username=f'{prefix}{i}', password=password) for i in range(options['users']))
+        user_ids = []
+        while chunk := list(islice(users, batch_size)):
+            with transaction.atomic():
+                user_ids.extend(user.pk for user in User.objects.bulk_create(chunk))
+
+        now = timezone.now()
+        deadline_days = options['deadline_days']
+        statuses, status_weights = list(weights), list(weights.values())
+
+        def tasks():
+            number = 0
+            for user_id in user_ids:
+                for _ in range(options['tasks_per_user']):
+                    number += 1
+                    status = rng.choices(statuses, status_weights)[0]
+                    data_end_plan = now + timedelta(days=rng.uniform(-deadline_days, deadline_days))
+                    yield Task(
+                        name=f'Задача {number}',
+                        description=f'Описание задачи {number}',
+                        category=rng.choices(categories, category_weights)[0],
+                        data_end_plan=data_end_plan,
+                        status=status,
+                        data_end=data_end_plan - timedelta(days=rng.uniform(0, 3)) if status == 'completed' else None,
+                        user_id=user_id,
+                    )
+
+        created = 0
+        rows = tasks()
+        while chunk := list(islice(rows, batch_size)):
+            with transaction.atomic():
+                Task.objects.bulk_create(chunk)
+            created += len(chunk)
+            self.stdout.write(f'\rЗадач создано: {created}', ending='')
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {len(user_ids)}, категорий: {len(categories)}, задач: {created}'
+        ))
@@ -0,0 +1,116 @@
+"""
+Сбор метрик приложения в формате Prometheus (сами метрики определены в
+common.metrics): задержка, размер ответа и SQL-запросы по маршрутам Django.
+"""
+import contextvars
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+from common.metrics import (
+    QUERIES_PER_REQUEST, QUERY_DURATION, QUERY_ERRORS, REQUEST_DURATION, REQUESTS_IN_FLIGHT, RESPONSE_SIZE,
+    render_metrics, statement_label,
+)
+
+# Request being processed, the route is resolved lazily after URL resolution
+_current_request = contextvars.ContextVar('metrics_request', default=None)
+
+
+def route_label(request):
+    """
+    Шаблон пути сработавшего маршрута, например "edit_task/<int:task_id>/".
+    """
+    if request is None:
+        return 'none'
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.route or match.view_name
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """
+    Обёртка выполнения SQL-запросов, учитывающая их число и длительность.
+    """
+    request = _current_request.get()
+    route = route_label(request)
+    statement = statement_label(sql)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    except Exception:
+        QUERY_ERRORS.labels(route, statement).inc()
+        raise
+    finally:
+        QUERY_DURATION.labels(route, statement).observe(time.perf_counter() - start)
+        if request is not None:
+            request.metrics_queries = getattr(request, 'metrics_queries', 0) + 1
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    # The signal fires on every reconnect of the same per-thread connection object
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+connection_created.connect(install_execute_wrapper)
+
+
+class MetricsMiddleware:
+    """
+    Middleware, учитывающая задержку, размер ответа и SQL-запросы каждого HTTP-запроса.
+    Работает как в синхронном (WSGI), так и в асинхронном (ASGI) режиме.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token, start = self._start(request)
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            self._finish(request, response, token, start)
+
+    async def __acall__(self, request):
+        token, start = self._start(request)
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            self._finish(request, response, token, start)
+
+    def _start(self, request):
+        REQUESTS_IN_FLIGHT.inc()
+        return _current_request.set(request), time.perf_counter()
+
+    def _finish(self, request, response, token, start):
+        duration = time.perf_counter() - start
+        REQUESTS_IN_FLIGHT.dec()
+        _current_request.reset(token)
+        route = route_label(request)
+        status = str(response.status_code) if response is not None else '500'
+        REQUEST_DURATION.labels(request.method, route, status).observe(duration)
+        # The size of a streaming response is not known until it has been sent
+        if response is not None and not response.streaming:
+            RESPONSE_SIZE.labels(request.method, route).observe(len(response.content))
+        QUERIES_PER_REQUEST.labels(route).observe(getattr(request, 'metrics_queries', 0))
+
+
+def metrics(request):
+    """
+    Метрики приложения в формате Prometheus.
+    """
+    content, content_type = render_metrics()
+    return HttpResponse(content, content_type=content_type)
@@ -32,5 +32,12 @@ class Task(models.Model):
     data_end = models.DateTimeField(null=True, blank=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    class Meta:
+        app_label = 'app'
+        indexes = [
+            models.Index(fields=['user', 'status'], name='task_user_status_idx'),
+            models.Index(fields=['user', 'data_end_plan'], name='task_user_data_end_plan_idx'),
+        ]
+
     def __str__(self):
         return self.name
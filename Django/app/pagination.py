@@ -0,0 +1,110 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class KeysetPage:
+    """
+    Страница результатов курсорной (keyset) пагинации.
+    """
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(task):
+    """
+    Кодирует позицию задачи (data_end_plan, id) в непрозрачную строку курсора.
+    """
+    raw = f'{task.data_end_plan.isoformat()}|{task.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Декодирует строку курсора в пару (data_end_plan, id).
+    Возвращает None, если курсор отсутствует или повреждён.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        data_end_plan, task_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(data_end_plan), int(task_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def _keyset_query(queryset, after, before, page_size):
+    """
+    Строит запрос страницы с одной лишней строкой, по которой определяется
+    наличие следующей (или предыдущей) страницы.
+    """
+    if before is not None:
+        data_end_plan, task_id = before
+        return queryset.filter(
+            Q(data_end_plan__lt=data_end_plan) | Q(data_end_plan=data_end_plan, id__lt=task_id)
+        ).order_by('-data_end_plan', '-id')[:page_size + 1]
+    if after is not None:
+        data_end_plan, task_id = after
+        queryset = queryset.filter(
+            Q(data_end_plan__gt=data_end_plan) | Q(data_end_plan=data_end_plan, id__gt=task_id)
+        )
+    return queryset.order_by('data_end_plan', 'id')[:page_size + 1]
+
+
+def _keyset_page(rows, after, before, page_size):
+    """
+    Собирает страницу и курсоры соседних страниц из результата запроса.
+    """
+    if before is not None:
+        has_prev = len(rows) > page_size
+        items = rows[:page_size][::-1]
+        has_next = True
+    else:
+        has_next = len(rows) > page_size
+        items = rows[:page_size]
+        has_prev = after is not None
+
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(items[-1]) if items and has_next else None,
+        prev_cursor=encode_cursor(items[0]) if items and has_prev else None,
+    )
+
+
+def _decode_cursors(after, before):
+    after = decode_cursor(after)
+    before = decode_cursor(before) if after is None else None
+    return after, before
+
+
+def keyset_paginate(queryset, after=None, before=None, page_size=50):
+    """
+    Возвращает страницу задач, упорядоченных по (data_end_plan, id).
+
+    Вместо OFFSET используется условие по ключу сортировки, поэтому стоимость
+    запроса не зависит от номера страницы и общего количества задач.
+    """
+    after, before = _decode_cursors(after, before)
+    rows = list(_keyset_query(queryset, after, before, page_size))
+    return _keyset_page(rows, after, before, page_size)
+
+
+async def akeyset_paginate(queryset, after=None, before=None, page_size=50):
+    """
+    Асинхронный вариант keyset_paginate().
+    """
+    after, before = _decode_cursors(after, before)
+    rows = [task async for task in _keyset_query(queryset, after, before, page_size)]
+    return _keyset_page(rows, after, before, page_size)
@@ -0,0 +1,28 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from app.cache import CATEGORY_VERSION_KEY, bump_version, user_version_key
+from app.models import Task, Category
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш панели управления владельца изменённой задачи после фиксации транзакции,
+    чтобы параллельный запрос не закэшировал под новой меткой данные, прочитанные до фиксации.
+    """
+    transaction.on_commit(partial(bump_version, user_version_key(instance.user_id)))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    """
+    Сбрасывает кэш панелей управления всех пользователей: название категории
+    отображается в строках задач. Метка обновляется после фиксации транзакции.
+    """
+    transaction.on_commit(partial(bump_version, CATEGORY_VERSION_KEY))
@@ -0,0 +1,423 @@
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+
+from django.contrib.auth import views as auth_views
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, reverse
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from app import async_views, views
+from app.categories import CategoryRegistry, category_registry
+from app.cache import CATEGORY_VERSION_KEY, bump_version, get_version, user_version_key
+from app.models import Task, Category
+
+
+# Pagination is tested on freshly rendered pages, the dashboard cache is covered by DashboardCacheTests
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+class DashboardPaginationTests(TestCase):
+    """
+    Тесты курсорной пагинации панели управления.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpassword')
+        cls.category = Category.objects.create(name='Категория')
+        start = timezone.now()
+        Task.objects.bulk_create([
+            Task(
+                name=f'Задача {i}',
+                description='Описание',
+                category=cls.category,
+                data_end_plan=start + timedelta(days=i // 2),
+                status='planned',
+                user=cls.user,
+            )
+            for i in range(views.DASHBOARD_PAGE_SIZE * 2 + 5)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_pages_cover_all_tasks_in_order(self):
+        seen = []
+        response = self.client.get(reverse('dashboard'))
+        while True:
+            page = response.context['tasks']
+            seen.extend(task.id for task in page)
+            if not page.next_cursor:
+                break
+            response = self.client.get(reverse('dashboard'), {'after': page.next_cursor})
+        expected = list(
+            Task.objects.filter(user=self.user).order_by('data_end_plan', 'id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_previous_page(self):
+        first = self.client.get(reverse('dashboard')).context['tasks']
+        second = self.client.get(reverse('dashboard'), {'after': first.next_cursor}).context['tasks']
+        back = self.client.get(reverse('dashboard'), {'before': second.prev_cursor}).context['tasks']
+        self.assertEqual([t.id for t in back], [t.id for t in first])
+        self.assertIsNone(back.prev_cursor)
+
+    def test_query_count_does_not_depend_on_rows(self):
+        self.client.get(reverse('dashboard'))
+        with self.assertNumQueries(3):
+            self.client.get(reverse('dashboard'))
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse('dashboard'), {'after': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['tasks']), views.DASHBOARD_PAGE_SIZE)
+
+
+class DashboardCacheTests(TestCase):
+    """
+    Тесты кэширования панели управления и его сброса по сигналам.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpassword')
+        cls.other = User.objects.create_user(username='other', password='testpassword')
+        cls.category = Category.objects.create(name='Категория')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.task = self.create_task(self.user)
+
+    def create_task(self, user):
+        return Task.objects.create(
+            name='Задача',
+            description='Описание',
+            category=self.category,
+            data_end_plan=timezone.now(),
+            status='planned',
+            user=user,
+        )
+
+    def test_repeat_view_runs_only_session_and_user_queries(self):
+        self.client.get(reverse('dashboard'))
+        with self.assertNumQueries(2):
+            self.client.get(reverse('dashboard'))
+
+    def test_repeat_view_does_not_query_tasks(self):
+        self.client.get(reverse('dashboard'))
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'Задача')
+        self.assertFalse([q for q in captured.captured_queries if '"app_task"' in q['sql']])
+
+    def test_task_change_invalidates_owner_dashboard(self):
+        self.client.get(reverse('dashboard'))
+        self.task.name = 'Переименованная задача'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.save()
+        self.assertContains(self.client.get(reverse('dashboard')), 'Переименованная задача')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.delete()
+        self.assertNotContains(self.client.get(reverse('dashboard')), 'Переименованная задача')
+
+    def test_category_change_invalidates_dashboard(self):
+        self.client.get(reverse('dashboard'))
+        self.category.name = 'Новая категория'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+        self.assertContains(self.client.get(reverse('dashboard')), 'Новая категория')
+
+    def test_version_changes_only_after_commit(self):
+        key = user_version_key(self.user.id)
+        before = get_version(key)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.task.save()
+            self.assertEqual(get_version(key), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_version(key), before)
+
+    def test_other_user_change_keeps_cache(self):
+        self.client.get(reverse('dashboard'))
+        self.create_task(self.other)
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(reverse('dashboard'))
+        self.assertFalse([q for q in captured.captured_queries if '"app_task"' in q['sql']])
+
+
+class CategoryRegistryTests(TestCase):
+    """
+    Тесты реестра категорий, используемого формой задачи и представлениями.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpassword')
+        cls.category = Category.objects.create(name='Категория')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def category_queries(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method)(url, data or {})
+        self.assertLess(response.status_code, 400)
+        return [q['sql'] for q in captured.captured_queries if '"app_category"' in q['sql']]
+
+    def test_add_task_form_does_not_query_categories_when_warm(self):
+        self.client.get(reverse('add_task'))
+        self.assertEqual(self.category_queries('get', reverse('add_task')), [])
+
+    def task_data(self, category):
+        return {
+            'name': 'Задача',
+            'description': 'Описание',
+            'category': category,
+            'data_end_plan': '2030-01-01',
+            'status': 'planned',
+        }
+
+    def test_add_task_post_only_checks_that_category_exists(self):
+        self.client.get(reverse('add_task'))
+        queries = self.category_queries('post', reverse('add_task'), self.task_data(self.category.pk))
+        # The registry is not reloaded, only the foreign key is checked
+        self.assertEqual(len(queries), 1)
+        self.assertIn('LIMIT 1', queries[0])
+        self.assertTrue(Task.objects.filter(user=self.user, category=self.category).exists())
+
+    def test_category_added_by_another_process_is_accepted(self):
+        self.client.get(reverse('add_task'))
+        # Another process has its own version stamp, so this one is not bumped
+        category = Category.objects.create(name='Новая категория')
+        response = self.client.post(reverse('add_task'), self.task_data(category.pk))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Task.objects.filter(user=self.user, category=category).exists())
+        self.assertContains(self.client.get(reverse('add_task')), 'Новая категория')
+
+    def test_category_deleted_by_another_process_is_rejected(self):
+        category = Category.objects.create(name='Удалённая категория')
+        self.client.get(reverse('add_task'))
+        Category.objects.filter(pk=category.pk).delete()
+        response = self.client.post(reverse('add_task'), self.task_data(category.pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Task.objects.exists())
+
+    def test_registry_is_reloaded_after_ttl(self):
+        registry = CategoryRegistry(ttl=-1)
+        registry.all()
+        category_registry.all()
+        Category.objects.create(name='Новая категория')
+        self.assertIn('Новая категория', [category.name for category in registry.all()])
+        self.assertNotIn('Новая категория', [category.name for category in category_registry.all()])
+
+    def test_new_category_is_offered_after_save(self):
+        self.client.get(reverse('add_task'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Новая категория')
+        self.assertContains(self.client.get(reverse('add_task')), 'Новая категория')
+
+    def test_unknown_category_is_rejected(self):
+        response = self.client.post(reverse('add_task'), {
+            'name': 'Задача',
+            'description': 'Описание',
+            'category': 999999,
+            'data_end_plan': '2030-01-01',
+            'status': 'planned',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Task.objects.exists())
+
+
+class AsyncUrlconf:
+    """
+    Маршруты задач с асинхронными представлениями, как под ASGI.
+    """
+    urlpatterns = [
+        path('dashboard/', async_views.dashboard, name='dashboard'),
+        path('add_task/', async_views.add_task, name='add_task'),
+        path('edit_task/<int:task_id>/', async_views.edit_task, name='edit_task'),
+        path('delete_task/<int:task_id>/', async_views.delete_task, name='delete_task'),
+        path('logout/', auth_views.LogoutView.as_view(next_page='/'), name='logout'),
+    ]
+
+
+@override_settings(ROOT_URLCONF=AsyncUrlconf)
+class AsyncViewsTests(TestCase):
+    """
+    Тесты асинхронных представлений задач.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpassword')
+        cls.other = User.objects.create_user(username='other', password='testpassword')
+        cls.category = Category.objects.create(name='Категория')
+
+    def setUp(self):
+        cache.clear()
+        self.async_client.force_login(self.user)
+        self.task = Task.objects.create(
+            name='Задача',
+            description='Описание',
+            category=self.category,
+            data_end_plan=timezone.now(),
+            status='planned',
+            user=self.user,
+        )
+
+    def task_data(self, **overrides):
+        data = {
+            'name': 'Новая задача',
+            'description': 'Описание',
+            'category': self.category.pk,
+            'data_end_plan': '2030-01-01',
+            'status': 'planned',
+        }
+        data.update(overrides)
+        return data
+
+    async def test_dashboard_lists_own_tasks(self):
+        response = await self.async_client.get(reverse('dashboard'))
+        self.assertContains(response, 'Задача')
+        self.assertContains(response, 'Категория')
+
+    async def test_add_task(self):
+        response = await self.async_client.post(reverse('add_task'), self.task_data())
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+        self.assertTrue(await Task.objects.filter(user=self.user, name='Новая задача').aexists())
+
+    async def test_edit_task(self):
+        url = reverse('edit_task', args=[self.task.id])
+        self.assertContains(await self.async_client.get(url), 'Задача')
+        response = await self.async_client.post(url, self.task_data(name='Изменённая задача'))
+        self.assertEqual(response.status_code, 302)
+        await self.task.arefresh_from_db()
+        self.assertEqual(self.task.name, 'Изменённая задача')
+
+    async def test_edit_task_with_category_added_after_registry_load(self):
+        url = reverse('edit_task', args=[self.task.id])
+        await self.async_client.get(url)
+        # The version bump runs on commit, which a TestCase transaction never reaches
+        category = await Category.objects.acreate(name='Новая категория')
+        await sync_to_async(bump_version)(CATEGORY_VERSION_KEY)
+        response = await self.async_client.post(url, self.task_data(category=category.pk))
+        self.assertEqual(response.status_code, 302)
+        await self.task.arefresh_from_db()
+        self.assertEqual(self.task.category_id, category.pk)
+
+    async def test_delete_task(self):
+        url = reverse('delete_task', args=[self.task.id])
+        self.assertEqual((await self.async_client.get(url)).status_code, 200)
+        await self.async_client.post(url)
+        self.assertFalse(await Task.objects.filter(id=self.task.id).aexists())
+
+    async def test_other_users_task_is_not_found(self):
+        await sync_to_async(self.async_client.force_login)(self.other)
+        response = await self.async_client.get(reverse('edit_task', args=[self.task.id]))
+        self.assertEqual(response.status_code, 404)
+
+
+class TaskQueryPlanTests(TestCase):
+    """
+    Проверяет, что запросы представлений к таблице задач обслуживаются индексами,
+    без полного сканирования таблицы и без сортировки во временном B-дереве.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpassword')
+        cls.other = User.objects.create_user(username='other', password='testpassword')
+        category = Category.objects.create(name='Категория')
+        start = timezone.now()
+        Task.objects.bulk_create([
+            Task(
+                name=f'Задача {i}',
+                description='Описание',
+                category=category,
+                data_end_plan=start + timedelta(days=i),
+                status='planned',
+                user=cls.user if i % 2 else cls.other,
+            )
+            for i in range(views.DASHBOARD_PAGE_SIZE * 4)
+        ])
+        cls.task = Task.objects.filter(user=cls.user).first()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def assertNoTaskTableScan(self, method, url, data=None):
+        with CaptureQueriesContext(connection) as captured:
+            response = getattr(self.client, method)(url, data or {})
+        self.assertLess(response.status_code, 400)
+        task_queries = [
+            query['sql'] for query in captured.captured_queries
+            if query['sql'].startswith('SELECT') and '"app_task"' in query['sql']
+        ]
+        self.assertTrue(task_queries, f'{url} did not query app_task')
+        with connection.cursor() as cursor:
+            for sql in task_queries:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[-1] for row in cursor.fetchall()]
+                scans = [
+                    step for step in plan
+                    if step.startswith('SCAN app_task') or step == 'USE TEMP B-TREE FOR ORDER BY'
+                ]
+                self.assertFalse(scans, f'app_task is not served by an index for {url}:\n{sql}\n{plan}')
+
+    def test_dashboard_first_page(self):
+        self.assertNoTaskTableScan('get', reverse('dashboard'))
+
+    def test_dashboard_next_and_previous_pages(self):
+        page = self.client.get(reverse('dashboard')).context['tasks']
+        self.assertNoTaskTableScan('get', reverse('dashboard'), {'after': page.next_cursor})
+        self.assertNoTaskTableScan('get', reverse('dashboard'), {'before': page.next_cursor})
+
+    def test_edit_task(self):
+        self.assertNoTaskTableScan('get', reverse('edit_task', args=[self.task.id]))
+
+    def test_delete_task(self):
+        self.assertNoTaskTableScan('get', reverse('delete_task', args=[self.task.id]))
+
+
+class MetricsTests(TestCase):
+    """
+    Тесты метрик Prometheus.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='testuser', password='testpassword')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def sample(self, name, **labels):
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    def test_request_is_recorded_by_route(self):
+        labels = {'method': 'GET', 'route': 'edit_task/<int:task_id>/', 'status': '404'}
+        before = self.sample('http_request_duration_seconds_count', **labels)
+        self.client.get(reverse('edit_task', args=[12345]))
+        self.assertEqual(self.sample('http_request_duration_seconds_count', **labels), before + 1)
+
+    def test_queries_are_recorded_by_route_and_statement(self):
+        labels = {'route': 'dashboard/', 'statement': 'SELECT app_task'}
+        before = self.sample('db_query_duration_seconds_count', **labels)
+        self.client.get(reverse('dashboard'))
+        self.assertGreater(self.sample('db_query_duration_seconds_count', **labels), before)
+        self.assertGreater(self.sample('db_queries_per_request_sum', route='dashboard/'), 0)
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('dashboard'))
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'http_request_duration_seconds_bucket{')
+        self.assertContains(response, 'route="dashboard/"')
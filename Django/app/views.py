@@ -1,15 +1,23 @@
 from app.models import Task, Category
+from app.cache import DASHBOARD_CACHE_TIMEOUT, dashboard_cache_key
+from app.categories import category_registry
 from app.forms import TaskForm
+from app.pagination import keyset_paginate
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.forms import UserCreationForm
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.loader import render_to_string
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth import views as auth_views
 
+DASHBOARD_PAGE_SIZE = 50
+
 def add_task(request):
     """
     Представление для добавления новой задачи.
     """
-    categories = Category.objects.all()
+    categories = category_registry.all()
     if request.method == 'POST':
         form = TaskForm(request.POST)
         if form.is_valid():
@@ -59,9 +67,22 @@ def login_view(request):
 def dashboard(request):
     """
     Представление для отображения панели управления пользователя.
-    """
-    tasks = Task.objects.filter(user=request.user)
-    return render(request, 'dashboard.html', {'tasks': tasks, 'user': request.user})
+    Отрисованная страница кэшируется до изменения задач пользователя или категорий.
+    """
+    after = request.GET.get('after')
+    before = request.GET.get('before')
+    cache_key = dashboard_cache_key(request.user.id, after, before)
+    content = cache.get(cache_key)
+    if content is None:
+        tasks = keyset_paginate(
+            Task.objects.filter(user=request.user).select_related('category'),
+            after=after,
+            before=before,
+            page_size=DASHBOARD_PAGE_SIZE,
+        )
+        content = render_to_string('dashboard.html', {'tasks': tasks, 'user': request.user}, request)
+        cache.set(cache_key, content, DASHBOARD_CACHE_TIMEOUT)
+    return HttpResponse(content)
 
 def delete_task(request, task_id):
     """
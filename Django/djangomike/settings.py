@@ -12,10 +12,14 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Общий код приложений (каталог common в корне репозитория).
+sys.path.insert(0, str(BASE_DIR.parent))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/4.2/howto/deployment/checklist/
@@ -42,6 +46,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'app.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -71,6 +76,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'djangomike.wsgi.application'
 
+# Асинхронные представления задач включаются точкой входа ASGI.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -78,11 +86,39 @@ WSGI_APPLICATION = 'djangomike.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# По умолчанию кэш хранится в памяти процесса. Метки версий, сбрасывающие кэш
+# панели управления, тогда тоже локальны для процесса: при нескольких рабочих
+# процессах остальные показывают устаревшую панель до истечения её таймаута
+# (DASHBOARD_CACHE_TIMEOUT, 300 с). Чтобы разделить кэш между процессами,
+# укажите каталог в переменной DJANGO_CACHE_DIR; manage.py check --deploy
+# предупреждает о кэше в памяти процесса.
+
+if os.environ.get('DJANGO_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['DJANGO_CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Реестр категорий процесса перечитывается не реже раза в столько секунд,
+# даже если метка версии категорий не менялась.
+CATEGORY_REGISTRY_TTL = float(os.environ.get('DJANGO_CATEGORY_REGISTRY_TTL', 60))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -21,20 +21,24 @@ Including another URLconf
    # path('admin/', admin.site.urls),
 #]
 
+from django.conf import settings
 from django.urls import path
-from app import views
+from app import async_views, metrics, views
 from django.contrib import admin
 from django.contrib.auth import views as auth_views
 
+# Под ASGI задачи обслуживаются асинхронными представлениями (см. djangomike/asgi.py).
+task_views = async_views if settings.ASYNC_VIEWS else views
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.index, name='index'),
     path('login/', views.login_view, name='login'),
     path('register/', views.register, name='register'),
-    path('dashboard/', views.dashboard, name='dashboard'),
-    path('add_task/', views.add_task, name='add_task'),
-    path('edit_task/<int:task_id>/', views.edit_task, name='edit_task'),
-    path('delete_task/<int:task_id>/', views.delete_task, name='delete_task'),
+    path('dashboard/', task_views.dashboard, name='dashboard'),
+    path('add_task/', task_views.add_task, name='add_task'),
+    path('edit_task/<int:task_id>/', task_views.edit_task, name='edit_task'),
+    path('delete_task/<int:task_id>/', task_views.delete_task, name='delete_task'),
     path('logout/', auth_views.LogoutView.as_view(next_page='/'), name='logout'),
+    path('metrics', metrics.metrics, name='metrics'),
 ]
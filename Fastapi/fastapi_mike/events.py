@@ -0,0 +1,94 @@
+"""
+Внутрипроцессная рассылка событий об изменении задач подписчикам
+Server-Sent Events.
+
+Каждое открытое соединение /events - это только очередь и ожидающая её
+сопрограмма, поэтому процесс выдерживает тысячи простаивающих подключений.
+События доставляются подписчикам того же процесса; при нескольких рабочих
+процессах клиент получает изменения, сделанные через его рабочий процесс,
+а остальные увидит при следующей перезагрузке страницы.
+"""
+import asyncio
+import json
+from collections import defaultdict
+
+# Maximum number of undelivered events per connection
+SUBSCRIBER_QUEUE_SIZE = 100
+# Interval of comment lines that keep idle connections open through proxies
+HEARTBEAT_SECONDS = 15
+
+
+class EventHub:
+    """
+    Подписки пользователей на события об изменении их задач.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        """
+        Создаёт очередь событий пользователя user_id для одного соединения.
+        """
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        """
+        Удаляет очередь закрытого соединения.
+        """
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    def has_subscribers(self, user_id: int) -> bool:
+        """
+        Есть ли у пользователя открытые соединения.
+        """
+        return user_id in self._subscribers
+
+    def publish(self, user_id: int, event: dict):
+        """
+        Отправляет событие во все соединения пользователя. Если клиент не успевает
+        забирать события, его очередь заменяется одним событием reset, по которому
+        страница перезагружается целиком.
+        """
+        for queue in self._subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "reset"})
+
+    def stats(self):
+        """
+        Текущие показатели: число пользователей и открытых соединений.
+        """
+        return {"users": len(self._subscribers),
+                "connections": sum(len(queues) for queues in self._subscribers.values())}
+
+
+async def event_stream(hub: EventHub, user_id: int):
+    """
+    Поток Server-Sent Events пользователя user_id.
+    """
+    queue = hub.subscribe(user_id)
+    try:
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            yield f"data: {json.dumps(event, default=str)}\n\n"
+    finally:
+        hub.unsubscribe(user_id, queue)
+
+
+event_hub = EventHub()
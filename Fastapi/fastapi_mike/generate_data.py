@@ -0,0 +1,112 @@
+"""
+Генератор синтетических пользователей и задач для нагрузочного тестирования.
+
+Запуск из каталога приложения:
+
+    python generate_data.py --users 1000 --tasks-per-user 1000 --seed 42
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+from itertools import islice
+
+from sqlalchemy import insert, select
+
+from main import SessionLocal, User, Task, pwd_context, rebuild_task_stats
+# main puts the repository root on sys.path
+from common.weights import parse_weights  # noqa: E402
+
+
+TASK_STATUSES = ("planned", "in_progress", "completed")
+
+
+def statuses_argument(value):
+    """
+    Тип аргумента --statuses: распределение статусов задач.
+    """
+    try:
+        return parse_weights(value, TASK_STATUSES)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+
+def generate_data(users, tasks_per_user, categories, statuses, category_skew, deadline_days, seed, batch_size, prefix,
+                  password):
+    """
+    Создаёт users пользователей по tasks_per_user задач пакетными вставками,
+    фиксируя транзакцию после каждых batch_size строк.
+    """
+    rng = random.Random(seed)
+    status_names, status_weights = list(statuses), list(statuses.values())
+    category_names = [f"{prefix} category {i + 1}" for i in range(categories)]
+    category_weights = [1 / (rank + 1) ** category_skew for rank in range(categories)]
+
+    db = SessionLocal()
+    try:
+        if db.scalar(select(User.id).where(User.username.startswith(prefix)).limit(1)) is not None:
+            raise SystemExit(f"Users with prefix {prefix!r} already exist, choose another --prefix")
+
+        # bcrypt is deliberately slow, so the hash is computed once and shared by all generated users.
+        hashed_password = pwd_context.hash(password)
+        user_rows = iter({"username": f"{prefix}{i}", "hashed_password": hashed_password} for i in range(users))
+        while chunk := list(islice(user_rows, batch_size)):
+            db.execute(insert(User), chunk)
+            db.commit()
+        user_ids = db.scalars(select(User.id).where(User.username.startswith(prefix)).order_by(User.id)).all()
+
+        now = datetime.now()
+
+        def task_rows():
+            number = 0
+            for user_id in user_ids:
+                for _ in range(tasks_per_user):
+                    number += 1
+                    status = rng.choices(status_names, status_weights)[0]
+                    data_end_plan = now + timedelta(days=rng.uniform(-deadline_days, deadline_days))
+                    yield {
+                        "name": f"Task {number}",
+                        "description": f"Description for task {number}",
+                        "category": rng.choices(category_names, category_weights)[0],
+                        "data_created": data_end_plan - timedelta(days=rng.uniform(1, 30)),
+                        "data_end_plan": data_end_plan,
+                        "status": status,
+                        "data_end": data_end_plan - timedelta(days=rng.uniform(0, 3)) if status == "completed" else None,
+                        "user_id": user_id,
+                    }
+
+        created = 0
+        rows = task_rows()
+        while chunk := list(islice(rows, batch_size)):
+            db.execute(insert(Task), chunk)
+            db.commit()
+            created += len(chunk)
+            print(f"\rTasks created: {created}", end="", flush=True)
+        print()
+        # Bulk inserts bypass the per-request counter updates, so the statistics are rebuilt once at the end.
+        rebuild_task_stats(db)
+        db.commit()
+        print(f"Users created: {len(user_ids)}, tasks created: {created}")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=100, help="number of users")
+    parser.add_argument("--tasks-per-user", type=int, default=1000, help="number of tasks per user")
+    parser.add_argument("--categories", type=int, default=10, help="number of distinct categories")
+    parser.add_argument("--statuses", type=statuses_argument, default="planned=5,in_progress=3,completed=2",
+                        help="status weights")
+    parser.add_argument("--category-skew", type=float, default=1.0,
+                        help="Zipf exponent of the category distribution (0 - uniform)")
+    parser.add_argument("--deadline-days", type=int, default=90, help="spread of data_end_plan around today, in days")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per transaction")
+    parser.add_argument("--prefix", default="loaduser", help="username prefix of generated users")
+    parser.add_argument("--password", default="1q2w3e", help="password of generated users")
+    args = parser.parse_args()
+    generate_data(**vars(args))
+
+
+if __name__ == "__main__":
+    main()
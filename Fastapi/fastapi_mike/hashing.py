@@ -0,0 +1,130 @@
+"""
+Хеширование и проверка паролей bcrypt в пуле процессов.
+
+bcrypt намеренно медленный: выполненный прямо в обработчике, он занимает
+цикл событий на десятки миллисекунд. Здесь вычисления выполняются в
+ограниченном пуле процессов, а при переполнении очереди запрос отклоняется
+сразу, вместо того чтобы ждать в ней неограниченно долго.
+"""
+import asyncio
+import multiprocessing
+import os
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.context import CryptContext
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Upper bounds of the queue wait histogram, in seconds
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class HashQueueFull(Exception):
+    """
+    Очередь пула хеширования переполнена, запрос следует отклонить.
+    """
+
+
+def _hash(password: str, submitted: float):
+    waited = time.monotonic() - submitted
+    return pwd_context.hash(password), waited
+
+
+def _verify(password: str, hashed_password: str, submitted: float):
+    waited = time.monotonic() - submitted
+    return pwd_context.verify(password, hashed_password), waited
+
+
+def _warm_up():
+    return pwd_context.hash("warm-up")
+
+
+class PasswordHasher:
+    """
+    Ограниченный пул процессов для bcrypt с учётом времени ожидания в очереди.
+    """
+
+    def __init__(self, pool_size: int, queue_limit: int):
+        self.pool_size = pool_size
+        self.queue_limit = queue_limit
+        self._executor = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.pool_size, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def _submit(self, function, *args):
+        if self._pending >= self.pool_size + self.queue_limit:
+            self.rejected += 1
+            raise HashQueueFull()
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, waited = await loop.run_in_executor(self._get_executor(), function, *args, time.monotonic())
+        finally:
+            self._pending -= 1
+        self.completed += 1
+        self.wait_sum += waited
+        self.wait_max = max(self.wait_max, waited)
+        self.wait_buckets[bisect_left(WAIT_BUCKETS, waited)] += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        """
+        Вычисляет хеш пароля.
+        """
+        return await self._submit(_hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        """
+        Проверяет пароль по хешу.
+        """
+        return await self._submit(_verify, password, hashed_password)
+
+    def stats(self):
+        """
+        Текущие показатели пула: глубина очереди, число выполненных и
+        отклонённых запросов, время ожидания в очереди.
+        """
+        return {
+            "pool_size": self.pool_size,
+            "queue_limit": self.queue_limit,
+            "in_flight": self._pending,
+            "queued": max(0, self._pending - self.pool_size),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_sum": self.wait_sum,
+            "wait_seconds_max": self.wait_max,
+            "wait_seconds_buckets": dict(zip([*map(str, WAIT_BUCKETS), "+Inf"], self.wait_buckets)),
+        }
+
+    async def start(self):
+        """
+        Запускает процессы пула заранее, чтобы первые запросы не ждали их старта.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, _warm_up) for _ in range(self.pool_size)))
+
+    async def shutdown(self):
+        """
+        Останавливает процессы пула, не блокируя цикл событий на время их завершения.
+        """
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    pool_size=int(os.environ.get("HASH_POOL_SIZE", os.cpu_count() or 1)),
+    queue_limit=int(os.environ.get("HASH_QUEUE_LIMIT", 64)),
+)
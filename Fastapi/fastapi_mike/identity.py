@@ -0,0 +1,26 @@
+"""
+Кеш сведений о пользователях сессий: вместо запроса к базе данных на каждый
+запрос авторизованного пользователя используются записи, сохранённые в памяти
+процесса не дольше ttl секунд.
+"""
+import os
+
+from common.identity import IdentityCache
+
+
+class CachedUser:
+    """
+    Облегчённая запись пользователя, не связанная с сессией SQLAlchemy.
+    """
+
+    __slots__ = ("id", "username")
+
+    def __init__(self, id: int, username: str):
+        self.id = id
+        self.username = username
+
+
+identity_cache = IdentityCache(
+    maxsize=int(os.environ.get("IDENTITY_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("IDENTITY_CACHE_TTL", 60)),
+)
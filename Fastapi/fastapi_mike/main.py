@@ -1,13 +1,18 @@
-from fastapi import FastAPI, Request, Form, Depends
-from fastapi.responses import RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey
+import os
+import sys
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, Form, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, ForeignKey, Index, and_, delete, func, insert, inspect, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker, relationship, Session
 from sqlalchemy.ext.declarative import declarative_base
-from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
-from passlib.context import CryptContext
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+from datetime import date, datetime
+from typing import Annotated, List, Literal, Optional, Union
+from collections import Counter
 from sqlalchemy import or_
 from datetime import datetime, timedelta
 from fastapi.responses import HTMLResponse
@@ -17,21 +22,85 @@ from fastapi import Request
 from fastapi.responses import RedirectResponse
 import uvicorn
 from fastapi.security import OAuth2PasswordBearer
-
-app = FastAPI()
+# Общий код приложений (каталог common в корне репозитория).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from hashing import HashQueueFull, password_hasher, pwd_context
+from pagination import decode_cursor, encode_cursor
+from templating import etag_matches, static_page, template_checksum, templates, warm_up
+from identity import CachedUser, identity_cache
+from events import event_hub, event_stream
+from writer import WriteQueue
+from metrics import MetricsMiddleware, instrument_engine, render_metrics
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Запуск и остановка ресурсов приложения.
+    """
+    warm_up()
+    await password_hasher.start()
+    if write_queue is not None:
+        write_queue.start()
+    yield
+    if write_queue is not None:
+        await write_queue.stop()
+    await password_hasher.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 # Add session middleware
 app.add_middleware(SessionMiddleware, secret_key="your-secret-key")
-
-templates = Jinja2Templates(directory="templates")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+app.add_middleware(MetricsMiddleware)
 
 # SQLAlchemy setup
-DATABASE_URL = "sqlite:///./fastapimike.db"
+# The synchronous engine is used for schema creation and command-line scripts,
+# request handlers use the asynchronous engine so queries never block the event loop.
+DATABASE_PATH = os.environ.get("FASTAPI_DB_PATH", "./fastapimike.db")
+DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{DATABASE_PATH}"
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+instrument_engine(async_engine.sync_engine)
 Base = declarative_base()
 
+# Optional single-writer mode: task writes are group-committed by one writer task.
+# It requires WAL, so that readers are not blocked while the writer holds its transaction.
+write_queue = None
+if os.environ.get("WRITE_QUEUE") == "1":
+    write_queue = WriteQueue(
+        AsyncSessionLocal,
+        max_batch=int(os.environ.get("WRITE_QUEUE_MAX_BATCH", 64)),
+        max_wait=float(os.environ.get("WRITE_QUEUE_MAX_WAIT_MS", 2)) / 1000,
+    )
+
+    @event.listens_for(engine, "connect")
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def enable_wal(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
+
+async def run_write(db: AsyncSession, operation):
+    """
+    Выполняет операцию записи operation(db) и фиксирует её: в режиме единственного
+    писателя - в групповой транзакции очереди записи, иначе - в сессии запроса.
+    """
+    if write_queue is None:
+        result = await operation(db)
+        await db.commit()
+        return result
+    return await write_queue.submit(operation)
+
+async def get_db():
+    """
+    Зависимость, предоставляющая асинхронную сессию базы данных на время запроса.
+    Сессия закрывается и при ошибке в обработчике.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # User model
 class User(Base):
     """
@@ -43,6 +112,31 @@ class User(Base):
     hashed_password = Column(String)
     tasks = relationship("Task", back_populates="user")
 
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target):
+    """
+    Удаляет изменённого или удалённого пользователя из кеша сессий.
+    """
+    identity_cache.invalidate(target.id)
+
+async def current_user(request: Request, db: AsyncSession = Depends(get_db)) -> Optional[CachedUser]:
+    """
+    Зависимость, возвращающая пользователя текущей сессии или None.
+    Записи пользователей берутся из кеша, база данных запрашивается только при промахе.
+    """
+    user_id = request.session.get("user_id")
+    if user_id is None:
+        return None
+    user = identity_cache.get(user_id)
+    if user is None:
+        row = (await db.execute(select(User.id, User.username).where(User.id == user_id))).first()
+        if row is None:
+            return None
+        user = CachedUser(row.id, row.username)
+        identity_cache.put(user)
+    return user
+
 # Task model
 class Task(Base):
     """
@@ -60,7 +154,111 @@ class Task(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     user = relationship("User", back_populates="tasks")
 
+    __table_args__ = (
+        Index("ix_tasks_user_status_created", "user_id", "status", "data_created"),
+        Index("ix_tasks_user_created", "user_id", "data_created"),
+    )
+
+# Task statistics model
+class TaskStat(Base):
+    """
+    Модель счётчиков задач пользователя по статусам.
+    Обновляется в той же транзакции, что и изменение задачи.
+    """
+    __tablename__ = "task_stats"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    status = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+def task_stats_upsert(user_id: int, status: str, delta: int):
+    """
+    Запрос, изменяющий счётчик задач пользователя со статусом status на delta.
+    """
+    statement = sqlite_insert(TaskStat).values(user_id=user_id, status=status, count=delta)
+    return statement.on_conflict_do_update(
+        index_elements=[TaskStat.user_id, TaskStat.status],
+        set_={"count": TaskStat.count + delta},
+    )
+
+async def adjust_task_stats(db: AsyncSession, user_id: int, status: str, delta: int):
+    """
+    Изменяет счётчик задач пользователя со статусом status на delta.
+    """
+    if user_id is None:
+        return
+    await db.execute(task_stats_upsert(user_id, status, delta))
+
+# Task list version model
+class TaskVersion(Base):
+    """
+    Модель версии списка задач пользователя.
+    Увеличивается при каждом добавлении, изменении или удалении задачи пользователя.
+    """
+    __tablename__ = "task_versions"
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+async def bump_task_version(db: AsyncSession, user_id: int):
+    """
+    Увеличивает версию списка задач пользователя.
+    """
+    statement = sqlite_insert(TaskVersion).values(user_id=user_id, version=1)
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[TaskVersion.user_id],
+        set_={"version": TaskVersion.version + 1},
+    ))
+
+async def task_statistics(db: AsyncSession, user_id: int):
+    """
+    Статистика задач пользователя из поддерживаемых счётчиков по статусам.
+    """
+    counts = dict((await db.execute(select(TaskStat.status, TaskStat.count).where(TaskStat.user_id == user_id))).all())
+    return {
+        "total_tasks": sum(counts.values()),
+        "completed_tasks": counts.get("completed", 0),
+        "in_progress_tasks": counts.get("in_progress", 0),
+        "planned_tasks": counts.get("planned", 0),
+    }
+
+async def publish_task_events(db: AsyncSession, user_id: int, events: list):
+    """
+    Рассылает открытым панелям пользователя события об изменении задач и новую статистику.
+    Вызывается после фиксации транзакции.
+    """
+    if not event_hub.has_subscribers(user_id):
+        return
+    for event in events:
+        event_hub.publish(user_id, event)
+    event_hub.publish(user_id, {"type": "stats", "statistics": await task_statistics(db, user_id)})
+
+def rebuild_task_stats(db: Session):
+    """
+    Пересчитывает счётчики задач по статусам из таблицы задач.
+    """
+    db.query(TaskStat).delete()
+    db.execute(TaskStat.__table__.insert().from_select(
+        ["user_id", "status", "count"],
+        db.query(Task.user_id, Task.status, func.count())
+        .filter(Task.user_id.isnot(None), Task.status.isnot(None))
+        .group_by(Task.user_id, Task.status),
+    ))
+    # Tasks may have changed outside the application, so every cached dashboard is invalidated;
+    # users without a version row are read as version 0 and get version 1
+    db.execute(update(TaskVersion).values(version=TaskVersion.version + 1))
+    db.execute(sqlite_insert(TaskVersion).from_select(
+        ["user_id", "version"],
+        select(Task.user_id, literal(1)).where(Task.user_id.isnot(None)).distinct(),
+    ).on_conflict_do_nothing(index_elements=[TaskVersion.user_id]))
+
+task_stats_missing = not inspect(engine).has_table(TaskStat.__tablename__)
 Base.metadata.create_all(bind=engine)
+# create_all() skips tables that already exist, so indexes added later are created separately
+for index in Task.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
+if task_stats_missing:
+    with SessionLocal() as db:
+        rebuild_task_stats(db)
+        db.commit()
 
 # Pydantic models for task form and filter form
 class TaskForm(BaseModel):
@@ -73,14 +271,137 @@ class TaskForm(BaseModel):
     data_end_plan: datetime
     status: str
 
+    @classmethod
+    def as_form(
+        cls,
+        name: str = Form(...),
+        description: str = Form(...),
+        category: str = Form(...),
+        data_end_plan: datetime = Form(...),
+        status: str = Form(...),
+    ):
+        """
+        Получение данных задачи из полей HTML-формы.
+        """
+        return cls(name=name, description=description, category=category, data_end_plan=data_end_plan, status=status)
+
+FILTER_PAGE_SIZE = 50
+FILTER_MAX_PAGE_SIZE = 200
+
 class FilterForm(BaseModel):
     """
     Модель формы фильтра для валидации данных фильтра.
     """
-    date: Optional[datetime]
+    created_from: Optional[date] = None
+    created_to: Optional[date] = None
+    name: Optional[str] = None
+    status: Optional[str] = None
+    cursor: Optional[str] = None
+    limit: int = FILTER_PAGE_SIZE
+
+    @field_validator("created_from", "created_to", mode="before")
+    @classmethod
+    def empty_date(cls, value):
+        """
+        Пустое поле даты из HTML-формы означает отсутствие фильтра.
+        """
+        return value or None
+
+class TaskOut(BaseModel):
+    """
+    Модель задачи в ответе API.
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
     name: Optional[str]
+    description: Optional[str]
+    category: Optional[str]
+    data_created: Optional[datetime]
+    data_end_plan: Optional[datetime]
     status: Optional[str]
-    priority: Optional[str]
+    data_end: Optional[datetime]
+
+class TaskPage(BaseModel):
+    """
+    Страница задач с курсором следующей страницы.
+    """
+    tasks: List[TaskOut]
+    next_cursor: Optional[str] = None
+
+BATCH_MAX_OPERATIONS = 1000
+
+class TaskPatch(BaseModel):
+    """
+    Изменяемые поля задачи; отсутствующие поля остаются без изменений.
+    """
+    name: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    data_end_plan: Optional[datetime] = None
+    status: Optional[str] = None
+
+    @field_validator("name", "description", "category", "data_end_plan", "status")
+    @classmethod
+    def not_null(cls, value):
+        """
+        Явный null не допускается: поле, которое не меняется, просто не передают.
+        """
+        if value is None:
+            raise ValueError("must not be null")
+        return value
+
+class CreateTaskOperation(BaseModel):
+    """
+    Операция пакета: создание задачи.
+    """
+    op: Literal["create"]
+    task: TaskForm
+
+class UpdateTaskOperation(BaseModel):
+    """
+    Операция пакета: изменение задачи.
+    """
+    op: Literal["update"]
+    id: int
+    task: TaskPatch
+
+class DeleteTaskOperation(BaseModel):
+    """
+    Операция пакета: удаление задачи.
+    """
+    op: Literal["delete"]
+    id: int
+
+TaskOperation = Annotated[
+    Union[CreateTaskOperation, UpdateTaskOperation, DeleteTaskOperation],
+    Field(discriminator="op"),
+]
+
+class TaskOperationResult(BaseModel):
+    """
+    Результат одной операции пакета.
+    """
+    index: int
+    op: str
+    id: Optional[int] = None
+    ok: bool = True
+    error: Optional[str] = None
+
+class TaskBatchResult(BaseModel):
+    """
+    Результат пакета: applied = False, если пакет отклонён целиком.
+    """
+    applied: bool
+    results: List[TaskOperationResult]
+
+@app.exception_handler(HashQueueFull)
+async def hash_queue_full_handler(request: Request, exc: HashQueueFull):
+    """
+    Отклоняет запрос, если очередь хеширования паролей переполнена.
+    """
+    return JSONResponse({"message": "Server is busy, please retry later"}, status_code=503,
+                        headers={"Retry-After": "1"})
 
 # Endpoints for login, registration, task addition, editing, deletion, and filtering
 @app.get("/")
@@ -88,18 +409,17 @@ async def index(request: Request):
     """
     Маршрут для отображения главной страницы.
     """
-    return templates.TemplateResponse("index.html", {"request": request})
+    return static_page("index.html", request)
 
 @app.post("/login")
-async def login(request: Request, username: str = Form(...), password: str = Form(...)):
+async def login(request: Request, username: str = Form(...), password: str = Form(...),
+                db: AsyncSession = Depends(get_db)):
     """
     Маршрут для аутентификации пользователя.
     """
-    db = SessionLocal()
-    user = db.query(User).filter(User.username == username).first()
-    db.close()
+    user = await db.scalar(select(User).where(User.username == username))
 
-    if not user or not pwd_context.verify(password, user.hashed_password):
+    if not user or not await password_hasher.verify(password, user.hashed_password):
         return {"message": "Invalid username or password"}
 
     # Authenticate user and redirect to dashboard
@@ -112,26 +432,24 @@ async def register(request: Request):
     """
     Маршрут для отображения страницы регистрации.
     """
-    return templates.TemplateResponse("register.html", {"request": request})
+    return static_page("register.html", request)
 
 @app.post("/register")
-async def register(username: str = Form(...), password: str = Form(...)):
+async def register(username: str = Form(...), password: str = Form(...), db: AsyncSession = Depends(get_db)):
     """
     Маршрут для регистрации пользователя.
     """
-    db = SessionLocal()
-    existing_user = db.query(User).filter(User.username == username).first()
+    existing_user = await db.scalar(select(User).where(User.username == username))
 
     if existing_user:
-        db.close()
         return {"message": "Username already exists"}
 
-    hashed_password = pwd_context.hash(password)
-    new_user = User(username=username, hashed_password=hashed_password)
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    db.close()
+    hashed_password = await password_hasher.hash(password)
+
+    async def insert_user(db: AsyncSession):
+        db.add(User(username=username, hashed_password=hashed_password))
+
+    await run_write(db, insert_user)
     response = RedirectResponse(url="/login")
     return response #{"message": "Registration successful"}
 
@@ -140,16 +458,18 @@ async def add_task_get(request: Request):
     """
     Маршрут для отображения страницы добавления задачи.
     """
-    return templates.TemplateResponse("add_task.html", {"request": request})
+    return static_page("add_task.html", request)
 
 @app.get("/edit-task/{task_id}")
-async def edit_task(request: Request, task_id: int):
+async def edit_task(request: Request, task_id: int, db: AsyncSession = Depends(get_db),
+                    user: Optional[CachedUser] = Depends(current_user)):
     """
     Маршрут для отображения страницы редактирования задачи.
     """
-    db = SessionLocal()
-    task = db.query(Task).filter(Task.id == task_id).first()
-    db.close()
+    if user is None:
+        return RedirectResponse(url="/login")
+
+    task = await db.scalar(select(Task).where(Task.id == task_id, Task.user_id == user.id))
 
     if not task:
         return {"message": "Task not found"}
@@ -157,130 +477,312 @@ async def edit_task(request: Request, task_id: int):
     return templates.TemplateResponse("edit_task.html", {"request": request, "task": task})
 
 @app.get("/dashboard")
-async def dashboard(request: Request):
+async def dashboard(request: Request, db: AsyncSession = Depends(get_db),
+                    user: Optional[CachedUser] = Depends(current_user)):
     """
     Маршрут для отображения панели управления.
     """
-    if "user_id" not in request.session:
+    if user is None:
         return RedirectResponse(url="/login")
 
-    user_id = request.session["user_id"]
-    db = SessionLocal()
-    user = db.query(User).filter(User.id == user_id).first()
-    tasks = db.query(Task).filter(Task.user_id == user_id).all()
-
-    # Calculate statistics
-    total_tasks = len(tasks)
-    completed_tasks = len([task for task in tasks if task.status == "completed"])
-    in_progress_tasks = len([task for task in tasks if task.status == "in_progress"])
-    planned_tasks = len([task for task in tasks if task.status == "planned"])
-    statistics = {
-        "total_tasks": total_tasks,
-        "completed_tasks": completed_tasks,
-        "in_progress_tasks": in_progress_tasks,
-        "planned_tasks": planned_tasks,
-    }
+    user_id = user.id
+    # Unchanged reloads are answered from the version counter alone, before any task rows are loaded
+    version = await db.scalar(select(TaskVersion.version).where(TaskVersion.user_id == user_id)) or 0
+    etag = f'"{user_id}-{version}-{template_checksum("dashboard.html")}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
 
-    db.close()
+    tasks = (await db.scalars(select(Task).where(Task.user_id == user_id))).all()
 
-    return templates.TemplateResponse("dashboard.html", {"request": request, "tasks": tasks, "statistics": statistics})
+    statistics = await task_statistics(db, user_id)
 
-@app.get("/add-task")
-async def add_task_get(request: Request):
-    """
-    Маршрут для отображения страницы добавления задачи.
-    """
-    # Render the add task page
-    return templates.TemplateResponse("add_task.html", {"request": request})
+    return templates.TemplateResponse("dashboard.html", {"request": request, "tasks": tasks, "statistics": statistics},
+                                      headers=headers)
 
 @app.post("/add-task")
-async def add_task_post(request: Request, task_data: TaskForm = Depends()):
+async def add_task_post(request: Request, task_data: TaskForm = Depends(TaskForm.as_form),
+                        db: AsyncSession = Depends(get_db), user: Optional[CachedUser] = Depends(current_user)):
     """
     Маршрут для добавления задачи в базу данных.
     """
+    if user is None:
+        return RedirectResponse(url="/login", status_code=303)
+
     # Add the task to the database
-    db = SessionLocal()
-    new_task = Task(
-        name=task_data.name,
-        description=task_data.description,
-        category=task_data.category,
-        data_created=datetime.now(),
-        data_end_plan=task_data.data_end_plan,
-        status=task_data.status,
-    )
-    db.add(new_task)
-    db.commit()
-    db.refresh(new_task)
-    db.close()
+    user_id = user.id
+
+    async def insert_task(db: AsyncSession):
+        new_task = Task(
+            name=task_data.name,
+            description=task_data.description,
+            category=task_data.category,
+            data_created=datetime.now(),
+            data_end_plan=task_data.data_end_plan,
+            status=task_data.status,
+            user_id=user_id,
+        )
+        db.add(new_task)
+        await adjust_task_stats(db, user_id, new_task.status, 1)
+        await bump_task_version(db, user_id)
+        await db.flush()
+        return new_task
+
+    new_task = await run_write(db, insert_task)
+    await publish_task_events(db, user_id, [{"type": "task_added", "task": TaskOut.model_validate(new_task).model_dump()}])
     # Redirect the user to the dashboard page
-    return responses.RedirectResponse(url="/dashboard", status_code=303)
+    return RedirectResponse(url="/dashboard", status_code=303)
 
 @app.post("/edit-task/{task_id}")
-async def edit_task(request: Request, task_id: int, task_data: TaskForm = Depends()):
+async def edit_task(request: Request, task_id: int, task_data: TaskForm = Depends(TaskForm.as_form),
+                    db: AsyncSession = Depends(get_db), user: Optional[CachedUser] = Depends(current_user)):
     """
     Маршрут для редактирования задачи в базе данных.
     """
-    db = SessionLocal()
-    task = db.query(Task).filter(Task.id == task_id).first()
+    if user is None:
+        return RedirectResponse(url="/login", status_code=303)
+
+    async def update_task(db: AsyncSession):
+        task = await db.scalar(select(Task).where(Task.id == task_id, Task.user_id == user.id))
+        if not task:
+            return None
+
+        if task.status != task_data.status:
+            await adjust_task_stats(db, task.user_id, task.status, -1)
+            await adjust_task_stats(db, task.user_id, task_data.status, 1)
+        task.name = task_data.name
+        task.description = task_data.description
+        task.category = task_data.category
+        task.data_end_plan = task_data.data_end_plan
+        task.status = task_data.status
+        await bump_task_version(db, task.user_id)
+        await db.flush()
+        return task
+
+    task = await run_write(db, update_task)
 
     if not task:
-        db.close()
         return {"message": "Task not found"}
 
-    task.name = task_data.name
-    task.description = task_data.description
-    task.category = task_data.category
-    task.data_end_plan = task_data.data_end_plan
-    task.status = task_data.status
-
-    db.commit()
-    db.refresh(task)
-    db.close()
+    await publish_task_events(db, user.id, [{"type": "task_changed", "task": TaskOut.model_validate(task).model_dump()}])
 
     return RedirectResponse(url="/dashboard", status_code=303)
 
 @app.post("/delete-task/{task_id}")
-async def delete_task(task_id: int):
+async def delete_task(request: Request, task_id: int, db: AsyncSession = Depends(get_db),
+                      user: Optional[CachedUser] = Depends(current_user)):
     """
     Маршрут для удаления задачи из базы данных.
     """
-    db = SessionLocal()
-    task = db.query(Task).filter(Task.id == task_id).first()
+    if user is None:
+        return RedirectResponse(url="/login", status_code=303)
 
-    if not task:
-        db.close()
+    async def remove_task(db: AsyncSession):
+        task = await db.scalar(select(Task).where(Task.id == task_id, Task.user_id == user.id))
+        if not task:
+            return False
+
+        await adjust_task_stats(db, task.user_id, task.status, -1)
+        await bump_task_version(db, task.user_id)
+        await db.delete(task)
+        return True
+
+    if not await run_write(db, remove_task):
         return {"message": "Task not found"}
 
-    db.delete(task)
-    db.commit()
-    db.close()
+    await publish_task_events(db, user.id, [{"type": "task_deleted", "id": task_id}])
 
     return {"message": "Task deleted successfully"}
 
-@app.post("/filter-tasks")
-async def filter_tasks(filter_data: FilterForm = Depends()):
+@app.api_route("/filter-tasks", methods=["GET", "POST"], response_model=TaskPage)
+async def filter_tasks(request: Request, filter_data: FilterForm = Query(), db: AsyncSession = Depends(get_db),
+                       user: Optional[CachedUser] = Depends(current_user)):
     """
-    Маршрут для фильтрации задач в базе данных.
+    Маршрут для фильтрации задач пользователя в базе данных.
+    Задачи выдаются по возрастанию (data_created, id) страницами по limit штук.
     """
-    db = SessionLocal()
-    query = db.query(Task)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
 
-    if filter_data.date:
-        query = query.filter(Task.data_created == filter_data.date)
-
-    if filter_data.name:
-        query = query.filter(Task.name.ilike(f"%{filter_data.name}%"))
+    query = select(*(getattr(Task, field) for field in TaskOut.model_fields))
+    query = query.where(Task.user_id == user.id)
 
     if filter_data.status:
-        query = query.filter(Task.status == filter_data.status)
+        query = query.where(Task.status == filter_data.status)
 
-    if filter_data.priority:
-        query = query.filter(Task.priority == filter_data.priority)
+    if filter_data.created_from:
+        query = query.where(Task.data_created >= datetime.combine(filter_data.created_from, datetime.min.time()))
+    if filter_data.created_to:
+        # created_to is inclusive: everything before the start of the next day
+        next_day = filter_data.created_to + timedelta(days=1)
+        query = query.where(Task.data_created < datetime.combine(next_day, datetime.min.time()))
 
-    tasks = query.all()
-    db.close()
-
-    return {"tasks": tasks}
+    if filter_data.name:
+        # Substring match is applied only to the rows selected by the (user_id, ...) index range
+        pattern = filter_data.name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.where(Task.name.ilike(f"%{pattern}%", escape="\\"))
+
+    after = decode_cursor(filter_data.cursor)
+    if after:
+        data_created, task_id = after
+        if data_created is None:
+            # Tasks without a creation date sort first: the rest of them, then every dated task
+            query = query.where(or_(
+                Task.data_created.is_not(None),
+                and_(Task.data_created.is_(None), Task.id > task_id),
+            ))
+        else:
+            query = query.where(or_(
+                Task.data_created > data_created,
+                and_(Task.data_created == data_created, Task.id > task_id),
+            ))
+
+    limit = min(max(filter_data.limit, 1), FILTER_MAX_PAGE_SIZE)
+    query = query.order_by(Task.data_created, Task.id).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+
+    page = TaskPage(tasks=[TaskOut.model_validate(row) for row in rows[:limit]])
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        page.next_cursor = encode_cursor(last.data_created, last.id)
+
+    # Serialized by pydantic-core directly, bypassing FastAPI's jsonable_encoder
+    return Response(content=page.model_dump_json(), media_type="application/json")
+
+@app.post("/api/tasks:batch", response_model=TaskBatchResult)
+async def batch_tasks(request: Request, operations: List[TaskOperation], db: AsyncSession = Depends(get_db),
+                      user: Optional[CachedUser] = Depends(current_user)):
+    """
+    Маршрут для пакетного создания, изменения и удаления задач пользователя.
+    Пакет проверяется целиком и применяется в одной транзакции: при ошибке
+    в любой операции не применяется ни одна.
+    """
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_OPERATIONS} operations per batch")
+
+    user_id = user.id
+
+    async def apply_batch(db: AsyncSession):
+        # The write queue may run the operation again after another one fails, so it starts from scratch;
+        # statuses are read in the write transaction, so the batch is checked against the rows it changes
+        results = [TaskOperationResult(index=index, op=operation.op, id=getattr(operation, "id", None))
+                   for index, operation in enumerate(operations)]
+        referenced = [operation.id for operation in operations if operation.op != "create"]
+        statuses = dict((await db.execute(
+            select(Task.id, Task.status).where(Task.id.in_(referenced), Task.user_id == user_id)
+        )).all()) if referenced else {}
+
+        seen = set()
+        for result in results:
+            if result.id is None:
+                continue
+            if result.id not in statuses:
+                result.ok, result.error = False, "Task not found"
+            elif result.id in seen:
+                result.ok, result.error = False, "Task referenced more than once"
+            seen.add(result.id)
+        if not all(result.ok for result in results):
+            return False, results, [], [], []
+
+        now = datetime.now()
+        created, updated, deleted = [], [], []
+        stats_delta = Counter()
+        for operation in operations:
+            if operation.op == "create":
+                created.append({**operation.task.model_dump(), "data_created": now, "user_id": user_id})
+                stats_delta[operation.task.status] += 1
+            elif operation.op == "update":
+                values = operation.task.model_dump(exclude_unset=True)
+                if values:
+                    updated.append({"id": operation.id, **values})
+                if "status" in values and values["status"] != statuses[operation.id]:
+                    # Tasks without a status are not counted in task_stats
+                    if statuses[operation.id] is not None:
+                        stats_delta[statuses[operation.id]] -= 1
+                    stats_delta[values["status"]] += 1
+            else:
+                deleted.append(operation.id)
+                if statuses[operation.id] is not None:
+                    stats_delta[statuses[operation.id]] -= 1
+
+        if created:
+            new_ids = (await db.scalars(insert(Task).returning(Task.id, sort_by_parameter_order=True), created)).all()
+            created_results = (result for result in results if result.op == "create")
+            for result, task_id in zip(created_results, new_ids):
+                result.id = task_id
+        if updated:
+            # Rows with the same set of changed columns are sent as one executemany UPDATE by primary key
+            await db.execute(update(Task), updated)
+        if deleted:
+            await db.execute(delete(Task).where(Task.id.in_(deleted), Task.user_id == user_id))
+        for status, delta in stats_delta.items():
+            if delta:
+                await adjust_task_stats(db, user_id, status, delta)
+        await bump_task_version(db, user_id)
+        return True, results, created, updated, deleted
+
+    applied, results, created, updated, deleted = await run_write(db, apply_batch)
+    if not applied:
+        return JSONResponse(status_code=422, content=TaskBatchResult(applied=False, results=results).model_dump())
+
+    events = [{"type": "task_added", "task": {**values, "id": result.id}}
+              for values, result in zip(created, (result for result in results if result.op == "create"))]
+    events += [{"type": "task_changed", "task": values} for values in updated]
+    events += [{"type": "task_deleted", "id": task_id} for task_id in deleted]
+    await publish_task_events(db, user_id, events)
+
+    return Response(content=TaskBatchResult(applied=True, results=results).model_dump_json(),
+                    media_type="application/json")
+
+@app.get("/events")
+async def events(db: AsyncSession = Depends(get_db), user: Optional[CachedUser] = Depends(current_user)):
+    """
+    Маршрут для получения изменений задач пользователя в виде Server-Sent Events.
+    """
+    if user is None:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    # The stream may stay open for hours, it must not hold a database connection
+    await db.close()
+    return StreamingResponse(event_stream(event_hub, user.id), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Маршрут для получения метрик приложения в формате Prometheus.
+    """
+    content, media_type = render_metrics()
+    return Response(content=content, media_type=media_type)
+
+@app.get("/metrics/password-hashing")
+async def password_hashing_metrics():
+    """
+    Маршрут для получения показателей пула хеширования паролей.
+    """
+    return password_hasher.stats()
+
+@app.get("/metrics/identity-cache")
+async def identity_cache_metrics():
+    """
+    Маршрут для получения показателей кеша пользователей сессий.
+    """
+    return identity_cache.stats()
+
+@app.get("/metrics/events")
+async def events_metrics():
+    """
+    Маршрут для получения числа открытых соединений /events.
+    """
+    return event_hub.stats()
+
+@app.get("/metrics/write-queue")
+async def write_queue_metrics():
+    """
+    Маршрут для получения показателей очереди записи (в режиме единственного писателя).
+    """
+    return write_queue.stats() if write_queue is not None else {"enabled": False}
 
 @app.get("/logout")
 async def logout_get():
@@ -330,6 +832,7 @@ def create_test_user_and_tasks():
                 user_id=test_user.id
             )
             db.add(task)
+            db.execute(task_stats_upsert(test_user.id, task.status, 1))
 
         try:
             db.commit()
@@ -0,0 +1,94 @@
+"""
+Сбор метрик приложения в формате Prometheus (сами метрики определены в
+common.metrics): задержка, размер ответа и SQL-запросы по маршрутам FastAPI.
+"""
+import contextvars
+import time
+
+from common.metrics import (
+    QUERIES_PER_REQUEST, QUERY_DURATION, QUERY_ERRORS, REQUEST_DURATION, REQUESTS_IN_FLIGHT, RESPONSE_SIZE,
+    render_metrics, statement_label,
+)
+
+# ASGI scope of the request being processed, the route is resolved lazily after routing
+_current_scope = contextvars.ContextVar("metrics_scope", default=None)
+
+# Long-lived Server-Sent Events streams would skew the latency and in-flight metrics
+UNMEASURED_PATHS = {"/events"}
+
+
+def route_label(scope) -> str:
+    """
+    Шаблон пути сработавшего маршрута, например "/edit-task/{task_id}".
+    """
+    if scope is None:
+        return "none"
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    scope = _current_scope.get()
+    if scope is not None:
+        scope["metrics.queries"] = scope.get("metrics.queries", 0) + 1
+    QUERY_DURATION.labels(route_label(scope), statement_label(statement)).observe(
+        time.perf_counter() - context._query_start
+    )
+
+
+def handle_error(exception_context):
+    QUERY_ERRORS.labels(route_label(_current_scope.get()), statement_label(exception_context.statement or "")).inc()
+
+
+def instrument_engine(engine):
+    """
+    Подключает учёт SQL-запросов к синхронному движку SQLAlchemy.
+    """
+    from sqlalchemy import event
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, учитывающая задержку, размер ответа и SQL-запросы каждого HTTP-запроса.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in UNMEASURED_PATHS:
+            return await self.app(scope, receive, send)
+
+        status = 500
+        size = 0
+
+        async def measuring_send(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        token = _current_scope.set(scope)
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, measuring_send)
+        finally:
+            duration = time.perf_counter() - start
+            REQUESTS_IN_FLIGHT.dec()
+            _current_scope.reset(token)
+            route = route_label(scope)
+            REQUEST_DURATION.labels(scope["method"], route, str(status)).observe(duration)
+            RESPONSE_SIZE.labels(scope["method"], route).observe(size)
+            QUERIES_PER_REQUEST.labels(route).observe(scope.get("metrics.queries", 0))
+
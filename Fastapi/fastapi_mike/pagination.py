@@ -0,0 +1,32 @@
+"""
+Курсоры для постраничной выдачи по ключу сортировки (data_created, id).
+Задачи без даты создания идут первыми (так SQLite упорядочивает NULL), их
+курсор хранит пустую дату.
+"""
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+
+
+def encode_cursor(data_created: Optional[datetime], task_id: int) -> str:
+    """
+    Кодирует позицию задачи в непрозрачную строку курсора.
+    """
+    raw = f"{data_created.isoformat() if data_created else ''}|{task_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[Optional[datetime], int]]:
+    """
+    Декодирует строку курсора в пару (data_created, id).
+    Возвращает None, если курсор отсутствует или повреждён.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        data_created, task_id = raw.rsplit("|", 1)
+        return (datetime.fromisoformat(data_created) if data_created else None), int(task_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
@@ -0,0 +1,22 @@
+"""
+Пересчёт таблицы task_stats по таблице задач.
+
+Запуск из каталога приложения:
+
+    python rebuild_task_stats.py
+"""
+from main import SessionLocal, TaskStat, rebuild_task_stats
+
+
+def main():
+    db = SessionLocal()
+    try:
+        rebuild_task_stats(db)
+        db.commit()
+        print(f"Task statistics rebuilt: {db.query(TaskStat).count()} counters")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
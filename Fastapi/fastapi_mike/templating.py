@@ -0,0 +1,84 @@
+"""
+Шаблоны Jinja2 с кешем скомпилированного байт-кода на диске и статические
+страницы, отрисованные один раз и отдаваемые из памяти.
+
+Каталог кеша задаётся переменной окружения TEMPLATE_CACHE_DIR (по умолчанию -
+временный каталог пользователя, общий для всех перезапусков процессов).
+"""
+import hashlib
+import os
+
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+TEMPLATE_DIR = "templates"
+
+bytecode_cache = FileSystemBytecodeCache(os.environ.get("TEMPLATE_CACHE_DIR") or None)
+env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=True, bytecode_cache=bytecode_cache)
+templates = Jinja2Templates(env=env)
+
+# Templates without per-request context, rendered once per process
+STATIC_TEMPLATES = ("index.html", "register.html", "add_task.html")
+
+
+class StaticPage:
+    """
+    Отрисованная страница со строгим ETag по её содержимому.
+    """
+
+    def __init__(self, body: str):
+        self.body = body.encode()
+        self.etag = '"%s"' % hashlib.sha256(self.body).hexdigest()[:32]
+
+    def response(self, request: Request) -> Response:
+        """
+        Ответ 304, если у клиента уже есть эта версия страницы, иначе сама страница.
+        """
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if etag_matches(request, self.etag):
+            return Response(status_code=304, headers=headers)
+        return HTMLResponse(self.body, headers=headers)
+
+
+_static_pages = {}
+_checksums = {}
+
+
+def template_checksum(name: str) -> str:
+    """
+    Контрольная сумма исходного текста шаблона name. Входит в ETag страниц,
+    чтобы изменение шаблона при обновлении приложения сбрасывало кеш браузеров.
+    """
+    if name not in _checksums:
+        source = templates.env.loader.get_source(templates.env, name)[0]
+        _checksums[name] = hashlib.sha256(source.encode()).hexdigest()[:12]
+    return _checksums[name]
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Проверяет, есть ли etag в заголовке If-None-Match запроса.
+    """
+    return etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+
+
+def warm_up():
+    """
+    Компилирует все шаблоны (байт-код попадает в дисковый кеш) и отрисовывает
+    статические страницы.
+    """
+    for name in templates.env.list_templates():
+        templates.get_template(name)
+    for name in STATIC_TEMPLATES:
+        _static_pages[name] = StaticPage(templates.get_template(name).render())
+
+
+def static_page(name: str, request: Request) -> Response:
+    """
+    Ответ со статической страницей name.
+    """
+    if name not in _static_pages:
+        _static_pages[name] = StaticPage(templates.get_template(name).render())
+    return _static_pages[name].response(request)
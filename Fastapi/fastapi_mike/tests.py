@@ -0,0 +1,335 @@
+"""
+Тесты приложения.
+
+Запуск из каталога приложения:
+
+    python -m unittest tests
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import delete, insert, select
+
+# Общий код приложений (каталог common в корне репозитория).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# The application reads its settings at import: a throw-away database and one hashing process
+_workdir = tempfile.TemporaryDirectory()
+os.environ["FASTAPI_DB_PATH"] = os.path.join(_workdir.name, "test.db")
+os.environ["HASH_POOL_SIZE"] = "1"
+os.environ.pop("WRITE_QUEUE", None)
+
+import main  # noqa: E402
+from hashing import password_hasher, pwd_context  # noqa: E402
+from identity import CachedUser, IdentityCache  # noqa: E402
+from writer import WriteQueue  # noqa: E402
+
+PASSWORD = "password"
+
+
+def tearDownModule():
+    asyncio.run(password_hasher.shutdown())
+
+
+class FakeSession:
+    """
+    Сессия базы данных, записывающая вызовы commit и rollback.
+    """
+
+    def __init__(self, log, fail_commit=False):
+        self.log = log
+        self.fail_commit = fail_commit
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def commit(self):
+        if self.fail_commit:
+            raise RuntimeError("commit failed")
+        self.log.append("commit")
+
+    async def rollback(self):
+        self.log.append("rollback")
+
+
+class WriteQueueTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Тесты очереди записи с групповой фиксацией транзакций.
+    """
+
+    async def asyncSetUp(self):
+        self.log = []
+        self.fail_commit = False
+        self.start_queue(max_batch=10, max_wait=0.05)
+
+    async def asyncTearDown(self):
+        await self.queue.stop()
+
+    def start_queue(self, max_batch, max_wait):
+        self.queue = WriteQueue(lambda: FakeSession(self.log, self.fail_commit), max_batch=max_batch, max_wait=max_wait)
+        self.queue.start()
+
+    async def grouped(self, *operations):
+        # The group is closed by its size, not by the timer, so all operations land in one group
+        await self.queue.stop()
+        self.start_queue(max_batch=len(operations), max_wait=60)
+        return await asyncio.gather(*(self.queue.submit(operation) for operation in operations),
+                                    return_exceptions=True)
+
+    async def test_operations_are_committed_in_one_transaction(self):
+        async def operation(db):
+            return len(self.log)
+
+        results = await self.grouped(*[operation] * 5)
+        self.assertEqual(results, [0] * 5)
+        self.assertEqual(self.log, ["commit"])
+
+    async def test_failing_operation_does_not_affect_others(self):
+        async def good(db):
+            return "ok"
+
+        async def bad(db):
+            raise ValueError("bad operation")
+
+        results = await self.grouped(good, bad, good)
+        self.assertEqual(results[0], "ok")
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[2], "ok")
+        self.assertEqual(self.log, ["rollback", "commit"])
+
+    async def test_cancelled_caller_of_failing_operation_keeps_writer_alive(self):
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_failure(db):
+            started.set()
+            await release.wait()
+            raise ValueError("bad operation")
+
+        caller = asyncio.create_task(self.queue.submit(slow_failure))
+        await started.wait()
+        caller.cancel()
+        release.set()
+        with self.assertRaises(asyncio.CancelledError):
+            await caller
+
+        async def operation(db):
+            return "ok"
+
+        self.assertEqual(await asyncio.wait_for(self.queue.submit(operation), 1), "ok")
+
+    async def test_commit_failure_is_reported_to_callers(self):
+        self.fail_commit = True
+
+        async def operation(db):
+            return "ok"
+
+        with self.assertRaises(RuntimeError):
+            await self.queue.submit(operation)
+        self.fail_commit = False
+        self.assertEqual(await asyncio.wait_for(self.queue.submit(operation), 1), "ok")
+
+    async def test_submit_restarts_finished_writer(self):
+        self.queue._task.cancel()
+        await asyncio.sleep(0)
+
+        async def operation(db):
+            return "ok"
+
+        self.assertEqual(await asyncio.wait_for(self.queue.submit(operation), 1), "ok")
+
+
+class ApiTests(unittest.IsolatedAsyncioTestCase):
+    """
+    Тесты маршрутов: курсорной пагинации, пакетных операций, ETag панели управления и событий.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        with main.SessionLocal() as db:
+            for username in ("apiuser", "otheruser"):
+                if db.scalar(select(main.User).where(main.User.username == username)) is None:
+                    db.add(main.User(username=username, hashed_password=pwd_context.hash(PASSWORD)))
+            db.commit()
+            cls.user_id = db.scalar(select(main.User.id).where(main.User.username == "apiuser"))
+            cls.other_id = db.scalar(select(main.User.id).where(main.User.username == "otheruser"))
+
+    async def asyncSetUp(self):
+        with main.SessionLocal() as db:
+            for model in (main.Task, main.TaskStat, main.TaskVersion):
+                db.execute(delete(model))
+            db.commit()
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test")
+        response = await self.client.post("/login", data={"username": "apiuser", "password": PASSWORD})
+        self.assertEqual(response.status_code, 303)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        # Pooled aiosqlite connections belong to this test's event loop
+        await main.async_engine.dispose()
+
+    def add_tasks(self, *rows):
+        with main.SessionLocal() as db:
+            ids = db.scalars(insert(main.Task).returning(main.Task.id, sort_by_parameter_order=True), [
+                {"name": "Задача", "description": "", "category": "Дом", "status": "planned",
+                 "data_end_plan": datetime(2030, 1, 1), "user_id": self.user_id, **row}
+                for row in rows
+            ]).all()
+            main.rebuild_task_stats(db)
+            db.commit()
+        return ids
+
+    def task_statuses(self):
+        with main.SessionLocal() as db:
+            return dict(db.execute(select(main.Task.id, main.Task.status)).all())
+
+    async def test_filter_tasks_pages_through_all_tasks(self):
+        start = datetime(2026, 1, 1)
+        ids = self.add_tasks(
+            {"data_created": start + timedelta(days=1)},
+            {"data_created": None},
+            {"data_created": start},
+            {"data_created": None},
+            {"data_created": start},
+        )
+        self.add_tasks({"data_created": start, "user_id": self.other_id})
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 2, "cursor": cursor} if cursor else {"limit": 2}
+            response = await self.client.get("/filter-tasks", params=params)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            seen += [task["id"] for task in page["tasks"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        # Tasks without a creation date come first, then (data_created, id)
+        self.assertEqual(seen, [ids[1], ids[3], ids[2], ids[4], ids[0]])
+
+    async def test_batch_rejects_explicit_null(self):
+        [task_id] = self.add_tasks({"data_created": datetime.now()})
+        response = await self.client.post("/api/tasks:batch", json=[
+            {"op": "update", "id": task_id, "task": {"status": None}},
+        ])
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.task_statuses(), {task_id: "planned"})
+
+    async def test_batch_reports_errors_per_operation(self):
+        [own_id] = self.add_tasks({"data_created": datetime.now()})
+        [other_id] = self.add_tasks({"data_created": datetime.now(), "user_id": self.other_id})
+        response = await self.client.post("/api/tasks:batch", json=[
+            {"op": "update", "id": own_id, "task": {"status": "completed"}},
+            {"op": "delete", "id": other_id},
+            {"op": "update", "id": own_id, "task": {"name": "Другая"}},
+        ])
+        self.assertEqual(response.status_code, 422)
+        body = response.json()
+        self.assertFalse(body["applied"])
+        self.assertEqual([(result["ok"], result["error"]) for result in body["results"]], [
+            (True, None), (False, "Task not found"), (False, "Task referenced more than once"),
+        ])
+        self.assertEqual(self.task_statuses(), {own_id: "planned", other_id: "planned"})
+
+    async def test_batch_is_applied_with_statistics(self):
+        keep_id, remove_id = self.add_tasks({"data_created": datetime.now()}, {"data_created": datetime.now()})
+        response = await self.client.post("/api/tasks:batch", json=[
+            {"op": "create", "task": {"name": "Новая", "description": "", "category": "Дом",
+                                      "data_end_plan": "2030-01-01T00:00:00", "status": "in_progress"}},
+            {"op": "update", "id": keep_id, "task": {"status": "completed"}},
+            {"op": "delete", "id": remove_id},
+        ])
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertTrue(body["applied"])
+        new_id = body["results"][0]["id"]
+        self.assertEqual(self.task_statuses(), {keep_id: "completed", new_id: "in_progress"})
+        with main.SessionLocal() as db:
+            stats = dict(db.execute(select(main.TaskStat.status, main.TaskStat.count)
+                                    .where(main.TaskStat.user_id == self.user_id)).all())
+        self.assertEqual(stats, {"planned": 0, "completed": 1, "in_progress": 1})
+
+    async def test_dashboard_is_not_modified_until_tasks_change(self):
+        self.add_tasks({"data_created": datetime.now()})
+        response = await self.client.get("/dashboard")
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers["etag"]
+        response = await self.client.get("/dashboard", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        await self.client.post("/api/tasks:batch", json=[
+            {"op": "create", "task": {"name": "Новая", "description": "", "category": "Дом",
+                                      "data_end_plan": "2030-01-01T00:00:00", "status": "planned"}},
+        ])
+        response = await self.client.get("/dashboard", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["etag"], etag)
+
+    async def test_events_deliver_task_changes(self):
+        # The event stream never ends, so it is read from the ASGI application directly
+        body, disconnected = asyncio.Queue(), asyncio.Event()
+
+        async def receive():
+            if not hasattr(receive, "sent"):
+                receive.sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                await body.put(message["body"].decode())
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": "/events", "raw_path": b"/events", "root_path": "", "query_string": b"",
+            "server": ("test", 80), "client": ("127.0.0.1", 1),
+            "headers": [(b"host", b"test"), (b"cookie", f"session={self.client.cookies['session']}".encode())],
+        }
+        stream = asyncio.create_task(main.app(scope, receive, send))
+        try:
+            self.assertTrue((await asyncio.wait_for(body.get(), 5)).startswith("retry:"))
+            await self.client.post("/api/tasks:batch", json=[
+                {"op": "create", "task": {"name": "Новая", "description": "", "category": "Дом",
+                                          "data_end_plan": "2030-01-01T00:00:00", "status": "planned"}},
+            ])
+            event = json.loads((await asyncio.wait_for(body.get(), 5)).removeprefix("data: "))
+            self.assertEqual((event["type"], event["task"]["name"]), ("task_added", "Новая"))
+            event = json.loads((await asyncio.wait_for(body.get(), 5)).removeprefix("data: "))
+            self.assertEqual((event["type"], event["statistics"]["planned_tasks"]), ("stats", 1))
+        finally:
+            disconnected.set()
+            await asyncio.wait_for(stream, 5)
+
+
+class IdentityCacheTests(unittest.TestCase):
+    """
+    Тесты кеша записей пользователей.
+    """
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = IdentityCache(maxsize=2, ttl=60)
+        for user_id in (1, 2):
+            cache.put(CachedUser(user_id, f"user{user_id}"))
+        cache.get(1)
+        cache.put(CachedUser(3, "user3"))
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(1).username, "user1")
+        self.assertEqual(cache.get(3).username, "user3")
+
+    def test_expired_entry_is_a_miss(self):
+        cache = IdentityCache(maxsize=2, ttl=-1)
+        cache.put(CachedUser(1, "user1"))
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Очередь записи с групповой фиксацией транзакций.
+
+Каждая операция записи - это сопрограмма operation(db), изменяющая данные в
+переданной сессии. Единственная задача-писатель забирает операции из очереди
+и выполняет до max_batch операций, пришедших в течение max_wait секунд, в
+одной транзакции, поэтому блокировка базы данных и fsync приходятся на группу,
+а не на каждую операцию. Вызывающий получает результат своей операции после
+фиксации группы.
+"""
+import asyncio
+
+from fastapi.logger import logger
+
+
+class WriteQueue:
+    """
+    Единственный писатель, объединяющий операции записи в групповые транзакции.
+    """
+
+    def __init__(self, session_factory, max_batch: int, max_wait: float):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = None
+        self._task = None
+        self.commits = 0
+        self.operations = 0
+
+    def start(self):
+        """
+        Запускает задачу-писателя в текущем цикле событий; завершившийся писатель
+        запускается заново, уже поставленные операции остаются в очереди.
+        """
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Дожидается записи уже поставленных в очередь операций и останавливает писателя.
+        """
+        if self._task is not None:
+            await self._queue.join()
+            self._task.cancel()
+            self._task = None
+            self._queue = None
+
+    async def submit(self, operation):
+        """
+        Ставит операцию в очередь и возвращает её результат после фиксации транзакции.
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _commit(self, batch):
+        # A failing operation rolls back the whole group: it gets its exception
+        # and the remaining operations are replayed in a fresh transaction.
+        pending = [(operation, future) for operation, future in batch if not future.cancelled()]
+        while pending:
+            async with self.session_factory() as db:
+                results = []
+                for operation, future in pending:
+                    try:
+                        results.append(await operation(db))
+                    except Exception as error:
+                        await db.rollback()
+                        if not future.cancelled():
+                            future.set_exception(error)
+                        pending = [item for item in pending if item[1] is not future]
+                        break
+                else:
+                    try:
+                        await db.commit()
+                    except Exception as error:
+                        for _, future in pending:
+                            if not future.cancelled():
+                                future.set_exception(error)
+                        return
+                    self.commits += 1
+                    self.operations += len(pending)
+                    for (_, future), result in zip(pending, results):
+                        if not future.cancelled():
+                            future.set_result(result)
+                    return
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                await self._commit(batch)
+            except Exception as error:
+                # The writer must outlive a failed group, otherwise every later submit hangs
+                logger.exception("Write queue failed to process a batch of %s operations", len(batch))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def stats(self):
+        """
+        Текущие показатели: длина очереди, число групповых транзакций и операций в них.
+        """
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "commits": self.commits,
+            "operations": self.operations,
+            "max_batch": self.max_batch,
+            "max_wait_seconds": self.max_wait,
+        }
@@ -1,18 +1,57 @@
+import os
+import random
+import sys
+import threading
+import time
 from datetime import datetime, timedelta
-from flask import Flask, render_template, redirect, url_for, flash, request
+from itertools import islice
+
+import click
+from flask import (
+    Flask, render_template, redirect, url_for, flash, request, jsonify, Response, stream_template,
+    get_flashed_messages,
+)
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField, RadioField, DateField, TextAreaField, SelectField
-from wtforms.validators import DataRequired, Length, Email, EqualTo
+from wtforms import (
+    StringField, PasswordField, SubmitField, RadioField, DateField, TextAreaField, SelectField, IntegerField,
+)
+from wtforms.validators import DataRequired, Length, Email, EqualTo, NumberRange
 from flask_bootstrap import Bootstrap
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+
+# Общий код приложений (каталог common в корне репозитория).
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from categories import CategoryIndex
+from common.weights import parse_weights
+from identity import CachedUser, identity_cache
+from jobs import JobQueue
+from metrics import init_metrics
+from schema import MIGRATIONS, stamp_schema, upgrade_schema
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your_secret_key'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///siteflask.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('FLASK_DATABASE_URI', 'sqlite:///siteflask.db')
+# The full task list (dashboard?all=1) is streamed unless FLASK_DASHBOARD_STREAM=0
+app.config['DASHBOARD_STREAM'] = os.environ.get('FLASK_DASHBOARD_STREAM', '1') == '1'
 db = SQLAlchemy(app)
 Bootstrap(app)
 login_manager = LoginManager(app)
+with app.app_context():
+    init_metrics(app, db.engine)
+
+    @event.listens_for(db.engine, 'connect')
+    def enable_wal(dbapi_connection, connection_record):
+        """
+        Переводит базу данных в журнал WAL: читатели не блокируют запись, поэтому страница,
+        отправляемая по частям медленному клиенту, не задерживает изменения задач.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.close()
 
 class User(UserMixin, db.Model):
     """
@@ -22,7 +61,8 @@ class User(UserMixin, db.Model):
     username = db.Column(db.String(20), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(60), nullable=False)
-    tasks = db.relationship('Task', backref='author', lazy=True)
+    # A query-returning relationship: a user's tasks are filtered, sorted and paged in SQL
+    tasks = db.relationship('Task', backref='author', lazy='dynamic')
 
 class Task(db.Model):
     """
@@ -37,6 +77,267 @@ class Task(db.Model):
     status = db.Column(db.String(20), nullable=False, default='запланирована')
     data_end = db.Column(db.DateTime, nullable=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    # When the reminder about the current deadline was sent; reset when the deadline moves
+    reminded_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_task_user_end_plan', 'user_id', 'data_end_plan'),
+        db.Index('ix_task_user_status_end_plan', 'user_id', 'status', 'data_end_plan'),
+        db.Index('ix_task_end_plan', 'data_end_plan'),
+        db.Index('ix_task_user_created', 'user_id', 'data_created'),
+    )
+
+class Job(db.Model):
+    """
+    Модель фонового задания (см. jobs.py).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(50), nullable=False)
+    # Unique name of a periodic job, empty for one-off jobs
+    key = db.Column(db.String(50), unique=True, nullable=True)
+    payload = db.Column(db.Text, nullable=False, default='{}')
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    interval = db.Column(db.Integer, nullable=True)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+TASK_STATUSES = ['запланирована', 'в работе', 'выполнена']
+
+# Bulk actions on the dashboard and the largest number of tasks changed in one request
+BULK_ACTIONS = [
+    ('в работе', 'Отметить как "в работе"'),
+    ('выполнена', 'Отметить как "выполнена"'),
+    ('postpone', 'Перенести срок на N дней'),
+    ('delete', 'Удалить'),
+]
+BULK_MAX_TASKS = 1000
+
+DASHBOARD_PAGE_SIZE = 50
+DASHBOARD_MAX_PAGE_SIZE = 200
+# Rows fetched from the cursor at a time and bytes sent per chunk when streaming the full list
+DASHBOARD_STREAM_ROWS = 500
+DASHBOARD_STREAM_BUFFER = 16384
+
+# Dashboard sort keys; the id makes the order stable for pagination
+DASHBOARD_SORTS = {
+    'data_end_plan': (Task.data_end_plan, Task.id),
+    '-data_end_plan': (Task.data_end_plan.desc(), Task.id.desc()),
+    'data_created': (Task.data_created, Task.id),
+    '-data_created': (Task.data_created.desc(), Task.id.desc()),
+}
+
+def init_schema(target=None):
+    """
+    Создаёт отсутствующие таблицы и применяет к базе данных новые миграции схемы (schema.py)
+    до target включительно. Новая база данных создаётся в актуальном виде и только отмечается
+    последней версией. Возвращает список применённых миграций.
+    """
+    fresh = not db.inspect(db.engine).has_table(Task.__tablename__)
+    db.create_all()
+    if fresh:
+        stamp_schema(db.engine)
+        return []
+    return upgrade_schema(db.engine, target)
+
+def buffered(chunks, size=DASHBOARD_STREAM_BUFFER):
+    """
+    Объединяет мелкие фрагменты потокового рендеринга шаблона в блоки не меньше size символов.
+    """
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+schema_lock = threading.Lock()
+schema_ready = False
+
+def migrate_schema():
+    """
+    Применяет новые миграции схемы перед первым запросом к приложению.
+    """
+    global schema_ready
+    if schema_ready:
+        return
+    with schema_lock:
+        if not schema_ready:
+            init_schema()
+            schema_ready = True
+
+# Schema migrations are applied when the application starts serving requests, not at import,
+# so CLI commands (flask upgrade-schema --target) control them; disabled by FLASK_AUTO_MIGRATE=0
+if os.environ.get('FLASK_AUTO_MIGRATE', '1') == '1':
+    app.before_request(migrate_schema)
+
+# Reminders are sent for unfinished tasks due within this window; the deadline scan
+# walks the data_end_plan index in batches and remembers where it stopped
+REMINDER_WINDOW = timedelta(hours=24)
+DEADLINE_SCAN_INTERVAL = 300
+DEADLINE_SCAN_BATCH = 500
+
+jobs = JobQueue(app, db, Job, workers=int(os.environ.get('FLASK_JOB_WORKERS', 2)))
+
+def due_soon(task):
+    """
+    Попадает ли незавершённая задача в окно напоминаний.
+    """
+    data_end_plan = task.data_end_plan
+    if not isinstance(data_end_plan, datetime):
+        data_end_plan = datetime.combine(data_end_plan, datetime.min.time())
+    return (task.status != 'выполнена' and task.reminded_at is None
+            and data_end_plan <= datetime.utcnow() + REMINDER_WINDOW)
+
+@jobs.handler('deadline-scan', max_attempts=3)
+def deadline_scan(payload):
+    """
+    Периодическое задание: ставит напоминания по задачам, срок которых наступает в пределах окна.
+    Задачи просматриваются по индексу плановой даты порциями, начиная с позиции прошлого запуска.
+    """
+    horizon = datetime.utcnow() + REMINDER_WINDOW
+    if payload.get('cursor'):
+        position, last_id = datetime.fromisoformat(payload['cursor'][0]), payload['cursor'][1]
+    else:
+        position, last_id = datetime.utcnow(), 0
+    while True:
+        rows = db.session.execute(
+            db.select(Task.id, Task.user_id, Task.data_end_plan)
+            .where(
+                db.or_(Task.data_end_plan > position, db.and_(Task.data_end_plan == position, Task.id > last_id)),
+                Task.data_end_plan <= horizon,
+                Task.status != 'выполнена',
+                Task.reminded_at.is_(None),
+            )
+            .order_by(Task.data_end_plan, Task.id)
+            .limit(DEADLINE_SCAN_BATCH)
+        ).all()
+        if not rows:
+            break
+        by_user = {}
+        for task_id, user_id, _ in rows:
+            by_user.setdefault(user_id, []).append(task_id)
+        for user_id, task_ids in by_user.items():
+            jobs.enqueue('deadline-reminder', {'user_id': user_id, 'task_ids': task_ids})
+        db.session.commit()
+        _, _, position = rows[-1]
+        last_id = rows[-1][0]
+    return {'cursor': [position.isoformat(), last_id]}
+
+@jobs.handler('deadline-reminder')
+def deadline_reminder(payload):
+    """
+    Напоминание пользователю о задачах с наступающим сроком.
+    Задача, о которой уже напомнили (её могли поставить и маршрут, и просмотр сроков), пропускается.
+    Способ доставки (почта, мессенджер) в приложении не настроен, поэтому напоминание пишется в журнал.
+    """
+    user = db.session.get(User, payload['user_id'])
+    if user is None:
+        return
+    # The reminder is marked in the job's own transaction, so a concurrent duplicate finds nothing to send
+    task_ids = db.session.scalars(
+        db.update(Task)
+        .where(Task.id.in_(payload['task_ids']), Task.user_id == user.id, Task.status != 'выполнена',
+               Task.reminded_at.is_(None))
+        .values(reminded_at=datetime.utcnow())
+        .returning(Task.id)
+    ).all()
+    tasks = Task.query.filter(Task.id.in_(task_ids)).order_by(Task.data_end_plan).all()
+    if tasks:
+        app.logger.info('Напоминание для %s <%s>: %s', user.username, user.email,
+                        '; '.join(f'{task.name} до {task.data_end_plan:%d.%m.%Y %H:%M}' for task in tasks))
+
+def start_jobs():
+    """
+    Запускает обработку фоновых заданий в процессе веб-приложения (при первом запросе).
+    """
+    if not jobs.running:
+        jobs.schedule('deadline-scan', DEADLINE_SCAN_INTERVAL)
+        jobs.start()
+
+# Background jobs run inside the web process unless FLASK_JOBS_IN_PROCESS=0 (then use flask run-jobs)
+if os.environ.get('FLASK_JOBS_IN_PROCESS', '1') == '1':
+    app.before_request(start_jobs)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, target):
+    """
+    Сбрасывает снимок пользователя в кеше после изменения или удаления записи.
+    """
+    identity_cache.invalidate(target.id)
+
+def load_categories(user_id):
+    """
+    Категории задач пользователя с числом задач в каждой (один запрос с группировкой).
+    """
+    return db.session.execute(
+        db.select(Task.category, db.func.count()).where(Task.user_id == user_id).group_by(Task.category)
+    ).all()
+
+category_index = CategoryIndex(
+    load_categories,
+    maxsize=int(os.environ.get('CATEGORY_INDEX_SIZE', 10000)),
+    ttl=float(os.environ.get('CATEGORY_INDEX_TTL', 300)),
+)
+
+def queue_category_change(target, name, count):
+    """
+    Откладывает изменение числа задач категории до фиксации транзакции сессии задачи.
+    """
+    db.inspect(target).session.info.setdefault('category_changes', []).append((target.user_id, name, count))
+
+@event.listens_for(Task, 'after_insert')
+def count_new_category(mapper, connection, target):
+    """
+    Учитывает категорию новой задачи в подсказках категорий.
+    """
+    queue_category_change(target, target.category, 1)
+
+@event.listens_for(Task, 'after_update')
+def count_changed_category(mapper, connection, target):
+    """
+    Учитывает смену категории задачи в подсказках категорий.
+    """
+    history = db.inspect(target).attrs.category.history
+    for name in history.deleted:
+        queue_category_change(target, name, -1)
+    for name in history.added:
+        queue_category_change(target, name, 1)
+
+@event.listens_for(Task, 'after_delete')
+def count_deleted_category(mapper, connection, target):
+    """
+    Учитывает удаление задачи в подсказках категорий.
+    """
+    queue_category_change(target, target.category, -1)
+
+@event.listens_for(db.session, 'after_commit')
+def apply_category_changes(session):
+    """
+    Применяет к подсказкам категорий изменения зафиксированной транзакции.
+    """
+    for user_id, name, count in session.info.pop('category_changes', ()):
+        category_index.change(user_id, name, count)
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_category_changes(session):
+    """
+    Отбрасывает изменения подсказок категорий отменённой транзакции.
+    """
+    session.info.pop('category_changes', None)
 
 class RegistrationForm(FlaskForm):
     """
@@ -64,9 +365,17 @@ class TaskForm(FlaskForm):
     description = TextAreaField('Описание')
     category = StringField('Категория', validators=[DataRequired()])
     data_end_plan = DateField('Планируемая дата завершения', validators=[DataRequired()])
-    status = SelectField('Статус', choices=[('запланирована', 'запланирована'), ('в работе', 'в работе'), ('выполнена', 'выполнена')], default='запланирована')
+    status = SelectField('Статус', choices=[(status, status) for status in TASK_STATUSES], default='запланирована')
     submit = SubmitField('Сохранить задачу')
 
+class BulkActionForm(FlaskForm):
+    """
+    Форма группового действия над отмеченными задачами.
+    """
+    action = SelectField('Действие', choices=BULK_ACTIONS)
+    days = IntegerField('Дней', default=7, validators=[NumberRange(min=1, max=365)])
+    submit = SubmitField('Применить')
+
 @app.route("/")
 def home():
     """
@@ -81,8 +390,21 @@ def home():
 def load_user(user_id):
     """
     Функция загрузки пользователя для Flask-Login.
+    Берёт снимок пользователя из кеша, обращаясь к базе данных только при промахе, и
+    присоединяет его к сессии без запроса, чтобы задачи пользователя были доступны через User.tasks.
     """
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    user = identity_cache.get(user_id)
+    if user is None:
+        row = db.session.get(User, user_id)
+        if row is None:
+            return None
+        identity_cache.put(CachedUser(row.id, row.username, row.email))
+        return row
+    row = User(id=user.id, username=user.username, email=user.email)
+    make_transient_to_detached(row)
+    # load=False attaches the snapshot without a SELECT; the password is loaded only if read
+    return db.session.merge(row, load=False)
 
 @app.route("/register", methods=['GET', 'POST'])
 def register():
@@ -128,11 +450,43 @@ def logout():
 @app.route("/dashboard")
 def dashboard():
     """
-    Страница панели управления.
+    Страница панели управления: задачи пользователя постранично, с сортировкой и фильтром по статусу.
+    С параметром all=1 выводятся все задачи; страница при этом отправляется по частям по мере
+    чтения строк из курсора базы данных.
     """
     if current_user.is_authenticated:
-        tasks = Task.query.filter_by(author=current_user).all()
-        return render_template('dashboard.html', tasks=tasks)
+        status = request.args.get('status', '')
+        if status not in TASK_STATUSES:
+            status = ''
+        sort = request.args.get('sort', 'data_end_plan')
+        if sort not in DASHBOARD_SORTS:
+            sort = 'data_end_plan'
+        per_page = min(max(request.args.get('per_page', DASHBOARD_PAGE_SIZE, type=int), 1), DASHBOARD_MAX_PAGE_SIZE)
+
+        # A single grouped COUNT gives both the per-status totals and the pagination total
+        counts = dict(
+            current_user.tasks.with_entities(Task.status, db.func.count()).group_by(Task.status).all()
+        )
+        query = current_user.tasks
+        if status:
+            query = query.filter_by(status=status)
+        query = query.order_by(*DASHBOARD_SORTS[sort])
+        total = sum(counts.values())
+        context = dict(counts=counts, total=total, filtered_total=counts.get(status, 0) if status else total,
+                       statuses=TASK_STATUSES, status=status, sort=sort, pagination=None, bulk_form=BulkActionForm())
+        if request.args.get('all') == '1':
+            if app.config['DASHBOARD_STREAM']:
+                # The session cookie is sent before the body, so flashed messages are popped up front
+                get_flashed_messages(with_categories=True)
+                # Rows are read in chunks while the template is being sent
+                return Response(buffered(stream_template(
+                    'dashboard.html', tasks=query.yield_per(DASHBOARD_STREAM_ROWS), **context
+                )))
+            return render_template('dashboard.html', tasks=query.all(), **context)
+        pagination = query.paginate(per_page=per_page, error_out=False, count=False)
+        pagination.total = context['filtered_total']
+        context['pagination'] = pagination
+        return render_template('dashboard.html', tasks=pagination.items, **context)
     else:
         return redirect(url_for('login'))
 
@@ -144,8 +498,12 @@ def new_task():
     """
     form = TaskForm()
     if form.validate_on_submit():
-        task = Task(name=form.name.data, description=form.description.data, category=form.category.data, data_end_plan=form.data_end_plan.data, status=form.status.data, author=current_user)
+        category = category_index.canonical(current_user.id, form.category.data.strip())
+        task = Task(name=form.name.data, description=form.description.data, category=category, data_end_plan=form.data_end_plan.data, status=form.status.data, user_id=current_user.id)
         db.session.add(task)
+        if due_soon(task):
+            db.session.flush()
+            jobs.enqueue('deadline-reminder', {'user_id': current_user.id, 'task_ids': [task.id]})
         db.session.commit()
         flash('Ваша задача была создана!', 'success')
         return redirect(url_for('dashboard'))
@@ -157,9 +515,7 @@ def task(task_id):
     """
     Страница для просмотра задачи.
     """
-    task = Task.query.get_or_404(task_id)
-    if task.author != current_user:
-        abort(403)
+    task = current_user.tasks.filter_by(id=task_id).first_or_404()
     return render_template('task.html', title=task.name, task=task)
 
 @app.route("/task/<int:task_id>/update", methods=['GET', 'POST'])
@@ -168,16 +524,20 @@ def update_task(task_id):
     """
     Страница для обновления задачи.
     """
-    task = Task.query.get_or_404(task_id)
-    if task.author != current_user:
-        abort(403)
+    task = current_user.tasks.filter_by(id=task_id).first_or_404()
     form = TaskForm()
     if form.validate_on_submit():
         task.name = form.name.data
         task.description = form.description.data
-        task.category = form.category.data
-        task.data_end_plan = form.data_end_plan.data
+        task.category = category_index.canonical(current_user.id, form.category.data.strip())
+        data_end_plan = datetime.combine(form.data_end_plan.data, datetime.min.time())
+        if data_end_plan != task.data_end_plan:
+            # The new deadline gets its own reminder
+            task.data_end_plan = data_end_plan
+            task.reminded_at = None
         task.status = form.status.data
+        if due_soon(task):
+            jobs.enqueue('deadline-reminder', {'user_id': current_user.id, 'task_ids': [task.id]})
         db.session.commit()
         flash('Ваша задача была обновлена!', 'success')
         return redirect(url_for('dashboard'))
@@ -195,17 +555,197 @@ def delete_task(task_id):
     """
     Страница для удаления задачи.
     """
-    task = Task.query.get_or_404(task_id)
-    if task.author != current_user:
-        abort(403)
+    task = current_user.tasks.filter_by(id=task_id).first_or_404()
     db.session.delete(task)
     db.session.commit()
     flash('Ваша задача была удалена!', 'success')
     return redirect(url_for('dashboard'))
 
+@app.route("/tasks/bulk", methods=['POST'])
+@login_required
+def bulk_tasks():
+    """
+    Групповое действие над отмеченными задачами: смена статуса, перенос срока или удаление.
+    Выполняется одним запросом UPDATE или DELETE, затрагивающим только задачи текущего пользователя.
+    """
+    form = BulkActionForm()
+    values = request.form.getlist('task_ids')
+    task_ids = [int(value) for value in values if value.isdigit()]
+    if len(task_ids) != len(values):
+        # A malformed id is an error, not a task that is silently left out
+        flash('Неверный номер задачи', 'danger')
+        return redirect(url_for('dashboard'))
+    if not form.validate_on_submit() or not task_ids or len(task_ids) > BULK_MAX_TASKS:
+        flash(f'Отметьте от 1 до {BULK_MAX_TASKS} задач и выберите действие', 'danger')
+        return redirect(url_for('dashboard'))
+
+    tasks = current_user.tasks.filter(Task.id.in_(task_ids))
+    action = form.action.data
+    if action == 'delete':
+        changed = tasks.delete(synchronize_session=False)
+    elif action == 'postpone':
+        # SQLite datetime() drops the fractional seconds that SQLAlchemy stores, they are appended back
+        postponed = db.func.strftime('%Y-%m-%d %H:%M:%S', Task.data_end_plan, f'+{form.days.data} days')
+        changed = tasks.update(
+            {Task.data_end_plan: postponed.concat(db.func.substr(Task.data_end_plan, 20)), Task.reminded_at: None},
+            synchronize_session=False,
+        )
+    elif action == 'выполнена':
+        # Tasks that are already done keep their original completion date
+        data_end = db.case((Task.status == action, Task.data_end), else_=datetime.utcnow())
+        changed = tasks.update({Task.status: action, Task.data_end: data_end}, synchronize_session=False)
+    else:
+        changed = tasks.update({Task.status: action, Task.data_end: None}, synchronize_session=False)
+    db.session.commit()
+    if action == 'delete':
+        # A bulk DELETE bypasses ORM events, the category counts are rebuilt on next use
+        category_index.invalidate(current_user.id)
+    flash(f'Изменено задач: {changed}', 'success')
+    return redirect(url_for('dashboard'))
+
+@app.route("/categories/suggest")
+@login_required
+def suggest_categories():
+    """
+    Подсказки категорий по началу названия (параметр q) для поля категории в форме задачи.
+    """
+    prefix = request.args.get('q', '').strip()
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 10)
+    return jsonify([
+        {'name': name, 'count': count} for name, count in category_index.suggest(current_user.id, prefix, limit)
+    ])
+
+@app.route("/metrics/identity-cache")
+def identity_cache_metrics():
+    """
+    Показатели кеша пользователей: размер, число попаданий и промахов, доля попаданий.
+    """
+    return jsonify(identity_cache.stats())
+
+@app.route("/metrics/category-index")
+def category_index_metrics():
+    """
+    Показатели подсказок категорий: число загруженных деревьев пользователей и их построений.
+    """
+    return jsonify(category_index.stats())
+
+@app.route("/metrics/jobs")
+def jobs_metrics():
+    """
+    Показатели фоновых заданий: число заданий по состояниям, выполненные, повторённые и упавшие.
+    """
+    return jsonify(jobs.stats())
+
+@app.cli.command('run-jobs')
+@click.option('--once', is_flag=True, help='Выполнить созревшие задания и завершиться.')
+def run_jobs_command(once):
+    """
+    Выполняет фоновые задания в отдельном процессе (при FLASK_JOBS_IN_PROCESS=0).
+    """
+    init_schema()
+    jobs.schedule('deadline-scan', DEADLINE_SCAN_INTERVAL)
+    if once:
+        click.echo(f'Выполнено заданий: {jobs.run_pending()}')
+        return
+    jobs.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        jobs.stop()
+
+@app.cli.command('upgrade-schema')
+@click.option('--target', type=int, default=None, help='Номер миграции, до которой обновить схему (по умолчанию последняя).')
+def upgrade_schema_command(target):
+    """
+    Применяет к базе данных новые миграции схемы.
+    """
+    applied = init_schema(target)
+    for number, description in applied:
+        click.echo(f'Применена миграция {number}: {description}')
+    if not applied:
+        click.echo(f'Схема базы данных актуальна (последняя миграция: {MIGRATIONS[-1][0]}).')
+
+def statuses_option(ctx, param, value):
+    """
+    Разбирает распределение статусов задач параметра --statuses.
+    """
+    try:
+        return parse_weights(value, TASK_STATUSES)
+    except ValueError as error:
+        raise click.BadParameter(str(error))
+
+@app.cli.command('generate-data')
+@click.option('--users', default=100, show_default=True, help='Количество пользователей.')
+@click.option('--tasks-per-user', default=1000, show_default=True, help='Количество задач на пользователя.')
+@click.option('--categories', default=10, show_default=True, help='Количество категорий.')
+@click.option('--statuses', default='запланирована=5,в работе=3,выполнена=2', show_default=True,
+              callback=statuses_option, help='Распределение статусов задач (веса).')
+@click.option('--category-skew', default=1.0, show_default=True,
+              help='Показатель Ципфа для распределения задач по категориям (0 - равномерно).')
+@click.option('--deadline-days', default=90, show_default=True,
+              help='Разброс плановых дат завершения относительно текущей даты, в днях.')
+@click.option('--seed', default=42, show_default=True, help='Начальное значение генератора случайных чисел.')
+@click.option('--batch-size', default=5000, show_default=True, help='Количество строк в одной транзакции.')
+@click.option('--prefix', default='loaduser', show_default=True, help='Префикс имён создаваемых пользователей.')
+@click.option('--password', default='1q2w3e', show_default=True, help='Пароль создаваемых пользователей.')
+def generate_data(users, tasks_per_user, categories, statuses, category_skew, deadline_days, seed, batch_size, prefix,
+                  password):
+    """
+    Генерирует синтетических пользователей и задачи пакетными вставками для нагрузочного тестирования.
+    """
+    rng = random.Random(seed)
+    status_names, status_weights = list(statuses), list(statuses.values())
+    category_names = [f'{prefix} категория {i + 1}' for i in range(categories)]
+    category_weights = [1 / (rank + 1) ** category_skew for rank in range(categories)]
+
+    init_schema()
+    if User.query.filter(User.username.startswith(prefix)).first():
+        raise click.ClickException(f'Пользователи с префиксом {prefix!r} уже существуют, укажите другой --prefix.')
+
+    user_rows = iter(
+        {'username': f'{prefix}{i}', 'email': f'{prefix}{i}@test.ru', 'password': password} for i in range(users)
+    )
+    while chunk := list(islice(user_rows, batch_size)):
+        db.session.execute(db.insert(User), chunk)
+        db.session.commit()
+    user_ids = db.session.scalars(
+        db.select(User.id).where(User.username.startswith(prefix)).order_by(User.id)
+    ).all()
+
+    now = datetime.utcnow()
+
+    def task_rows():
+        number = 0
+        for user_id in user_ids:
+            for _ in range(tasks_per_user):
+                number += 1
+                status = rng.choices(status_names, status_weights)[0]
+                data_end_plan = now + timedelta(days=rng.uniform(-deadline_days, deadline_days))
+                yield {
+                    'name': f'Задача {number}',
+                    'description': f'Описание задачи {number}',
+                    'category': rng.choices(category_names, category_weights)[0],
+                    'data_created': data_end_plan - timedelta(days=rng.uniform(1, 30)),
+                    'data_end_plan': data_end_plan,
+                    'status': status,
+                    'data_end': data_end_plan - timedelta(days=rng.uniform(0, 3)) if status == 'выполнена' else None,
+                    'user_id': user_id,
+                }
+
+    created = 0
+    rows = task_rows()
+    while chunk := list(islice(rows, batch_size)):
+        db.session.execute(db.insert(Task), chunk)
+        db.session.commit()
+        created += len(chunk)
+        click.echo(f'\rЗадач создано: {created}', nl=False)
+    click.echo()
+    click.echo(f'Создано пользователей: {len(user_ids)}, задач: {created}')
+
 if __name__ == '__main__':
     with app.app_context():
-        db.create_all()
+        init_schema()
 
         # Create a test user
         user = User.query.filter_by(username='Mike').first()
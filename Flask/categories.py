@@ -0,0 +1,200 @@
+"""
+Подсказки категорий задач.
+
+Для каждого пользователя в памяти процесса строится префиксное дерево его
+категорий с числом задач в каждой. Дерево загружается одним запросом при
+первом обращении и далее обновляется после фиксации транзакций, создающих,
+изменяющих и удаляющих задачи, поэтому подсказка при наборе не обращается к
+базе данных. Регистр букв при
+сравнении не учитывается: вариант написания, встречающийся чаще других,
+предлагается как основной, что удерживает число различных категорий низким.
+"""
+import threading
+import time
+from collections import Counter, OrderedDict
+from heapq import nlargest
+
+
+class TrieNode:
+    """
+    Узел префиксного дерева категорий.
+    """
+
+    __slots__ = ('children', 'spellings', 'top')
+
+    def __init__(self):
+        self.children = {}
+        # Spellings of the category ending at this node with their task counts
+        self.spellings = None
+        # Cached best completions of this subtree, reset on every change below the node
+        self.top = None
+
+
+class CategoryTrie:
+    """
+    Префиксное дерево категорий одного пользователя с числом задач в каждой категории.
+    """
+
+    def __init__(self, top_size=10):
+        self.root = TrieNode()
+        self.top_size = top_size
+
+    def _path(self, name):
+        node = self.root
+        path = [node]
+        for char in name.casefold():
+            node = node.children.get(char)
+            if node is None:
+                return None
+            path.append(node)
+        return path
+
+    def add(self, name, count=1):
+        """
+        Изменяет число задач категории name на count (отрицательное значение уменьшает его).
+        """
+        node = self.root
+        node.top = None
+        path = [node]
+        for char in name.casefold():
+            node = node.children.setdefault(char, TrieNode())
+            node.top = None
+            path.append(node)
+        if node.spellings is None:
+            node.spellings = Counter()
+        node.spellings[name] += count
+        if node.spellings[name] <= 0:
+            del node.spellings[name]
+        if not node.spellings:
+            node.spellings = None
+            self._prune(name.casefold(), path)
+
+    def _prune(self, key, path):
+        # Drop the nodes that no longer lead to any category
+        for char, parent, node in zip(reversed(key), reversed(path[:-1]), reversed(path[1:])):
+            if node.children or node.spellings:
+                break
+            del parent.children[char]
+
+    def canonical(self, name):
+        """
+        Наиболее употребительное написание категории, совпадающей с name без учёта регистра, или None.
+        """
+        path = self._path(name)
+        if path is None or path[-1].spellings is None:
+            return None
+        return path[-1].spellings.most_common(1)[0][0]
+
+    def complete(self, prefix, limit):
+        """
+        До limit категорий, начинающихся с prefix, в порядке убывания числа задач.
+        """
+        path = self._path(prefix)
+        if path is None:
+            return []
+        node = path[-1]
+        if node.top is None:
+            node.top = nlargest(self.top_size, self._walk(node), key=lambda item: (item[1], item[0]))
+        return node.top[:limit]
+
+    def _walk(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.spellings is not None:
+                yield node.spellings.most_common(1)[0][0], sum(node.spellings.values())
+            stack.extend(node.children.values())
+
+
+class CategoryIndex:
+    """
+    Префиксные деревья категорий пользователей: LRU-кеш ограниченного размера, каждое
+    дерево перестраивается не реже чем раз в ttl секунд (изменения из других процессов).
+    """
+
+    def __init__(self, load, maxsize, ttl):
+        # load(user_id) returns (category, task count) pairs of the user
+        self.load = load
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._tries = OrderedDict()
+        # Users whose tries are being loaded: [loads in progress, changes made meanwhile]
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def _trie(self, user_id):
+        with self._lock:
+            entry = self._tries.get(user_id)
+            if entry is not None and entry[1] >= time.monotonic():
+                self._tries.move_to_end(user_id)
+                return entry[0]
+            loading = self._loading.setdefault(user_id, [0, 0])
+            loading[0] += 1
+            changes = loading[1]
+        # The query runs outside the lock, so loading one user does not block the others
+        try:
+            trie = CategoryTrie()
+            for name, count in self.load(user_id):
+                trie.add(name, count)
+        finally:
+            with self._lock:
+                loading[0] -= 1
+                if not loading[0]:
+                    del self._loading[user_id]
+        with self._lock:
+            self.builds += 1
+            # A change committed during the load may or may not be in its result,
+            # such a trie serves this call only and is loaded again on the next one
+            if loading[1] == changes:
+                self._tries[user_id] = (trie, time.monotonic() + self.ttl)
+                self._tries.move_to_end(user_id)
+                while len(self._tries) > self.maxsize:
+                    self._tries.popitem(last=False)
+        return trie
+
+    def suggest(self, user_id, prefix, limit=10):
+        """
+        Подсказки категорий пользователя по началу названия: список пар (категория, число задач).
+        """
+        trie = self._trie(user_id)
+        with self._lock:
+            return trie.complete(prefix, limit)
+
+    def canonical(self, user_id, name):
+        """
+        Существующее у пользователя написание категории name (без учёта регистра) или само name.
+        """
+        trie = self._trie(user_id)
+        with self._lock:
+            return trie.canonical(name) or name
+
+    def change(self, user_id, name, count):
+        """
+        Учитывает изменение числа задач категории, если дерево пользователя уже загружено.
+        Вызывается после фиксации транзакции, в которой изменились задачи.
+        """
+        with self._lock:
+            entry = self._tries.get(user_id)
+            if entry is not None:
+                entry[0].add(name, count)
+            if user_id in self._loading:
+                self._loading[user_id][1] += 1
+
+    def invalidate(self, user_id):
+        """
+        Удаляет дерево пользователя; оно будет перестроено при следующем обращении.
+        """
+        with self._lock:
+            self._tries.pop(user_id, None)
+            if user_id in self._loading:
+                self._loading[user_id][1] += 1
+
+    def stats(self):
+        """
+        Текущие показатели: число загруженных деревьев и число их построений.
+        """
+        with self._lock:
+            return {'users': len(self._tries), 'maxsize': self.maxsize, 'ttl_seconds': self.ttl,
+                    'builds': self.builds}
+
@@ -0,0 +1,29 @@
+"""
+Кеш пользователей для Flask-Login: вместо запроса к базе данных на каждый
+запрос авторизованного пользователя используются отсоединённые от сессии
+SQLAlchemy снимки, сохранённые в памяти процесса не дольше ttl секунд.
+На время запроса снимок присоединяется к сессии как объект User без запроса
+к базе данных (см. load_user в app.py).
+"""
+import os
+
+from flask_login import UserMixin
+
+from common.identity import IdentityCache
+
+
+class CachedUser(UserMixin):
+    """
+    Снимок пользователя, не связанный с сессией SQLAlchemy.
+    """
+
+    def __init__(self, id, username, email):
+        self.id = id
+        self.username = username
+        self.email = email
+
+
+identity_cache = IdentityCache(
+    maxsize=int(os.environ.get('IDENTITY_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('IDENTITY_CACHE_TTL', 60)),
+)
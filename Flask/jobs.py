@@ -0,0 +1,233 @@
+"""
+Фоновые задания приложения.
+
+Задания хранятся в таблице базы данных, поэтому переживают перезапуск
+процесса. Маршрут ставит задание в очередь одной вставкой строки в своей
+транзакции и сразу отвечает; поток-диспетчер забирает созревшие задания
+атомарным UPDATE и выполняет их в пуле потоков. Упавшее задание повторяется
+с экспоненциально растущей задержкой, пока не исчерпает число попыток.
+Периодическое задание - одна строка с интервалом, которая после выполнения
+снова откладывается на интервал; значение, возвращённое его обработчиком,
+становится параметрами следующего запуска (так периодическое задание хранит
+позицию, до которой оно уже дошло). Пока задание выполняется, его аренда
+продлевается раз в треть lease; задание, не продлевавшее её дольше lease
+секунд (например, после падения процесса), забирается заново.
+"""
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+
+class JobQueue:
+    """
+    Очередь фоновых заданий поверх таблицы model и пул потоков, выполняющий их.
+    """
+
+    def __init__(self, app, db, model, workers=2, poll_interval=1.0, retry_delay=5.0, lease=300.0):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.lease = lease
+        self.handlers = {}
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._slots = threading.Semaphore(workers)
+        self._lock = threading.Lock()
+        self._dispatcher = None
+        self._executor = None
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+
+    def handler(self, name, max_attempts=5):
+        """
+        Декоратор, регистрирующий функцию handler(payload) как обработчик заданий name.
+        """
+        def register(function):
+            self.handlers[name] = (function, max_attempts)
+            return function
+        return register
+
+    def enqueue(self, name, payload=None, delay=0):
+        """
+        Добавляет задание в сессию базы данных; оно сохраняется вместе с транзакцией вызывающего.
+        """
+        if name not in self.handlers:
+            raise KeyError(f'unknown job {name!r}')
+        job = self.model(
+            name=name, payload=json.dumps(payload or {}, ensure_ascii=False),
+            run_at=datetime.utcnow() + timedelta(seconds=delay), max_attempts=self.handlers[name][1],
+        )
+        self.db.session.add(job)
+        self._wakeup.set()
+        return job
+
+    def schedule(self, name, interval, payload=None):
+        """
+        Регистрирует периодическое задание name с интервалом interval секунд, если его ещё нет.
+        """
+        self.db.session.execute(
+            insert(self.model).values(
+                name=name, key=name, payload=json.dumps(payload or {}, ensure_ascii=False),
+                run_at=datetime.utcnow(), interval=interval, max_attempts=self.handlers[name][1],
+                status='pending', attempts=0,
+            ).on_conflict_do_nothing(index_elements=['key'])
+        )
+        self.db.session.commit()
+
+    @property
+    def running(self):
+        """
+        Запущен ли поток-диспетчер в этом процессе.
+        """
+        return self._dispatcher is not None
+
+    def start(self):
+        """
+        Запускает поток-диспетчер и пул потоков, если они ещё не запущены.
+        """
+        with self._lock:
+            if self._dispatcher is not None:
+                return
+            self._stopping.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+            self._dispatcher = threading.Thread(target=self._dispatch, name='job-dispatcher', daemon=True)
+            self._dispatcher.start()
+
+    def stop(self, wait=True):
+        """
+        Останавливает диспетчер и дожидается выполняющихся заданий.
+        """
+        with self._lock:
+            if self._dispatcher is None:
+                return
+            self._stopping.set()
+            self._wakeup.set()
+            self._dispatcher.join()
+            self._executor.shutdown(wait=wait)
+            self._dispatcher = None
+            self._executor = None
+
+    def run_pending(self):
+        """
+        Выполняет в текущем потоке все созревшие задания и возвращает их число.
+        """
+        done = 0
+        while (job := self._claim()) is not None:
+            self._run(*job)
+            done += 1
+        return done
+
+    def _claim(self):
+        # A single UPDATE ... RETURNING makes claiming atomic across threads and processes
+        model = self.model
+        now = datetime.utcnow()
+        due = select(model.id).where(
+            ((model.status == 'pending') & (model.run_at <= now))
+            | ((model.status == 'running') & (model.updated_at < now - timedelta(seconds=self.lease)))
+        ).order_by(model.run_at).limit(1)
+        with self.app.app_context():
+            # An idle poll only reads, so it neither takes the write lock nor grows the WAL
+            if self.db.session.execute(due).first() is None:
+                self.db.session.rollback()
+                return None
+            row = self.db.session.execute(
+                update(model).where(model.id == due.scalar_subquery())
+                .values(status='running', attempts=model.attempts + 1, updated_at=now)
+                .returning(model.id, model.name, model.payload, model.attempts, model.interval)
+            ).first()
+            self.db.session.commit()
+        return row
+
+    def _run(self, job_id, name, payload, attempts, interval):
+        model = self.model
+        with self.app.app_context():
+            function, max_attempts = self.handlers.get(name, (None, 0))
+            done = threading.Event()
+            threading.Thread(target=self._heartbeat, args=(job_id, done), name=f'job-{job_id}-heartbeat',
+                             daemon=True).start()
+            try:
+                if function is None:
+                    raise KeyError(f'unknown job {name!r}')
+                result = function(json.loads(payload))
+            except Exception as error:
+                self.db.session.rollback()
+                self.app.logger.exception('Job %s #%s failed (attempt %s)', name, job_id, attempts)
+                values = {'last_error': repr(error)[:1000], 'updated_at': datetime.utcnow()}
+                if attempts >= max_attempts:
+                    self.failed += 1
+                    values['status'] = 'failed'
+                    # A periodic job is not abandoned, it waits for its next run
+                    if interval:
+                        values.update(status='pending', attempts=0,
+                                      run_at=datetime.utcnow() + timedelta(seconds=interval))
+                else:
+                    self.retried += 1
+                    backoff = self.retry_delay * 2 ** (attempts - 1)
+                    values.update(status='pending', run_at=datetime.utcnow() + timedelta(seconds=backoff))
+            else:
+                self.succeeded += 1
+                now = datetime.utcnow()
+                values = {'status': 'done', 'last_error': None, 'updated_at': now}
+                if interval:
+                    values.update(status='pending', attempts=0, run_at=now + timedelta(seconds=interval))
+                    if result is not None:
+                        values['payload'] = json.dumps(result, ensure_ascii=False)
+            done.set()
+            self.db.session.execute(update(model).where(model.id == job_id).values(**values))
+            self.db.session.commit()
+
+    def _heartbeat(self, job_id, done):
+        # Extends the lease of a running job, so that a long job is not claimed a second time
+        model = self.model
+        while not done.wait(self.lease / 3):
+            try:
+                with self.app.app_context():
+                    extended = self.db.session.execute(
+                        update(model).where(model.id == job_id, model.status == 'running')
+                        .values(updated_at=datetime.utcnow())
+                    ).rowcount
+                    self.db.session.commit()
+                if not extended:
+                    return
+            except Exception:
+                self.app.logger.exception('Job #%s failed to extend its lease', job_id)
+
+    def _dispatch(self):
+        while not self._stopping.is_set():
+            self._slots.acquire()
+            try:
+                job = self._claim()
+            except Exception:
+                self.app.logger.exception('Job dispatcher failed to claim a job')
+                job = None
+            if job is None:
+                self._slots.release()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            self._executor.submit(self._run_in_slot, job)
+
+    def _run_in_slot(self, job):
+        try:
+            self._run(*job)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        """
+        Текущие показатели: число заданий по состояниям и счётчики выполнений этого процесса.
+        """
+        with self.app.app_context():
+            states = dict(self.db.session.execute(
+                select(self.model.status, func.count()).group_by(self.model.status)
+            ).all())
+        return {'jobs': states, 'succeeded': self.succeeded, 'retried': self.retried, 'failed': self.failed,
+                'workers': self.workers, 'running': self.running}
@@ -0,0 +1,82 @@
+"""
+Сбор метрик приложения в формате Prometheus (сами метрики определены в
+common.metrics): задержка, размер ответа и SQL-запросы по маршрутам Flask.
+"""
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+from common.metrics import (
+    QUERIES_PER_REQUEST, QUERY_DURATION, QUERY_ERRORS, REQUEST_DURATION, REQUESTS_IN_FLIGHT, RESPONSE_SIZE,
+    render_metrics, statement_label,
+)
+
+def route_label():
+    """
+    Шаблон пути текущего маршрута, например "/task/<int:task_id>/update".
+    """
+    if not has_request_context():
+        return 'none'
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.metrics_queries = g.get('metrics_queries', 0) + 1
+    QUERY_DURATION.labels(route_label(), statement_label(statement)).observe(
+        time.perf_counter() - context._query_start
+    )
+
+
+def _handle_error(exception_context):
+    QUERY_ERRORS.labels(route_label(), statement_label(exception_context.statement or '')).inc()
+
+
+def _start_request():
+    g.metrics_start = time.perf_counter()
+    REQUESTS_IN_FLIGHT.inc()
+
+
+def _record_response(response):
+    g.metrics_status = response.status_code
+    # The size of a streamed response without Content-Length is not known until it has been sent
+    if response.content_length is not None:
+        RESPONSE_SIZE.labels(request.method, route_label()).observe(response.content_length)
+    return response
+
+
+def _finish_request(exception):
+    if 'metrics_start' not in g:
+        return
+    REQUESTS_IN_FLIGHT.dec()
+    route = route_label()
+    REQUEST_DURATION.labels(request.method, route, str(g.get('metrics_status', 500))).observe(
+        time.perf_counter() - g.metrics_start
+    )
+    QUERIES_PER_REQUEST.labels(route).observe(g.get('metrics_queries', 0))
+
+
+def metrics():
+    """
+    Метрики приложения в формате Prometheus.
+    """
+    content, content_type = render_metrics()
+    return Response(content, content_type=content_type)
+
+
+def init_metrics(app, engine):
+    """
+    Подключает сбор метрик к приложению app и движку SQLAlchemy engine и добавляет маршрут /metrics.
+    """
+    app.before_request(_start_request)
+    app.after_request(_record_response)
+    app.teardown_request(_finish_request)
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+    app.add_url_rule('/metrics', 'metrics', metrics)
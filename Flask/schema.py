@@ -0,0 +1,101 @@
+"""
+Версионирование схемы базы данных.
+
+Миграции - упорядоченный список (версия, описание, SQL-операторы), который
+только дополняется: применённую миграцию не изменяют и не удаляют, а новое
+изменение схемы оформляют следующей версией. Номера применённых миграций
+хранятся в таблице schema_version, поэтому индексы и столбцы добавляются в
+рабочую базу данных без её выгрузки и повторной загрузки. Новая база данных
+создаётся из моделей через db.create_all() уже в актуальном виде, поэтому
+все миграции в ней лишь отмечаются применёнными (stamp_schema), а не
+выполняются: миграция может содержать и неидемпотентные операторы, например
+ALTER TABLE ... ADD COLUMN. Индексы по-прежнему создаются с IF NOT EXISTS,
+так как базы данных, созданные до появления версий, уже могут их содержать.
+"""
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select
+from sqlalchemy.dialects.sqlite import insert
+
+MIGRATIONS = [
+    (1, 'Индекс задач пользователя по плановой дате завершения', [
+        'CREATE INDEX IF NOT EXISTS ix_task_user_end_plan ON task (user_id, data_end_plan)',
+    ]),
+    (2, 'Индекс задач пользователя по статусу и плановой дате завершения', [
+        'CREATE INDEX IF NOT EXISTS ix_task_user_status_end_plan ON task (user_id, status, data_end_plan)',
+    ]),
+    (3, 'Статистика распределения данных для планировщика запросов', [
+        'ANALYZE task',
+    ]),
+    (4, 'Индекс задач по плановой дате завершения для просмотра сроков фоновым заданием', [
+        'CREATE INDEX IF NOT EXISTS ix_task_end_plan ON task (data_end_plan)',
+    ]),
+    (5, 'Индекс задач пользователя по дате создания для сортировки панели управления', [
+        'CREATE INDEX IF NOT EXISTS ix_task_user_created ON task (user_id, data_created)',
+    ]),
+    (6, 'Время отправки напоминания о сроке задачи', [
+        'ALTER TABLE task ADD COLUMN reminded_at DATETIME',
+    ]),
+]
+
+metadata = MetaData()
+
+schema_version = Table(
+    'schema_version', metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+def current_version(connection):
+    """
+    Номер последней применённой миграции (0, если миграции не применялись).
+    """
+    versions = connection.scalars(select(schema_version.c.version)).all()
+    return max(versions, default=0)
+
+
+def stamp_schema(engine):
+    """
+    Отмечает все миграции применёнными, не выполняя их (для базы данных, только что созданной из моделей).
+    """
+    metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(
+            insert(schema_version).on_conflict_do_nothing(),
+            [{'version': number, 'description': description, 'applied_at': datetime.utcnow()}
+             for number, description, _ in MIGRATIONS],
+        )
+
+
+def upgrade_schema(engine, target=None):
+    """
+    Применяет к базе данных миграции с номерами выше текущего (до target включительно).
+    Каждая миграция выполняется в отдельной транзакции вместе с записью её номера.
+    Транзакция начинается с BEGIN IMMEDIATE, и номер текущей версии перечитывается
+    под этой блокировкой, поэтому из нескольких процессов, запущенных одновременно,
+    миграцию выполняет только один. Возвращает список применённых миграций.
+    """
+    metadata.create_all(engine)
+    applied = []
+    with engine.connect() as connection:
+        version = current_version(connection)
+        connection.rollback()
+        for number, description, statements in MIGRATIONS:
+            if number <= version or (target is not None and number > target):
+                continue
+            # The write lock is taken before the version is read, a concurrent upgrade waits here
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+            version = current_version(connection)
+            if number <= version:
+                connection.rollback()
+                continue
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+            connection.execute(
+                schema_version.insert().values(version=number, description=description, applied_at=datetime.utcnow())
+            )
+            connection.commit()
+            applied.append((number, description))
+    return applied
@@ -0,0 +1,379 @@
+"""
+Тесты приложения.
+
+Запуск из каталога приложения:
+
+    python -m unittest tests
+"""
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+# The application reads its settings at import: a throw-away database and no background threads
+_workdir = tempfile.TemporaryDirectory()
+os.environ['FLASK_DATABASE_URI'] = 'sqlite:///' + os.path.join(_workdir.name, 'test.db')
+os.environ['FLASK_JOBS_IN_PROCESS'] = '0'
+
+from app import Job, Task, User, app, category_index, db, deadline_scan, init_schema, jobs, load_user  # noqa: E402
+from identity import identity_cache  # noqa: E402
+from categories import CategoryIndex, CategoryTrie  # noqa: E402
+from jobs import JobQueue  # noqa: E402
+from schema import upgrade_schema  # noqa: E402
+
+
+class AppTestCase(unittest.TestCase):
+    """
+    Тест с пустой базой данных и контекстом приложения.
+    """
+
+    def setUp(self):
+        self.context = app.app_context()
+        self.context.push()
+        db.drop_all()
+        init_schema()
+
+    def tearDown(self):
+        db.session.remove()
+        self.context.pop()
+
+
+class SchemaTests(AppTestCase):
+    """
+    Тесты миграций схемы базы данных.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # The database as it was before migration 6
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql('ALTER TABLE task DROP COLUMN reminded_at')
+            connection.exec_driver_sql('DELETE FROM schema_version WHERE version = 6')
+
+    def test_pending_migration_is_applied_once(self):
+        self.assertEqual([number for number, _ in upgrade_schema(db.engine)], [6])
+        self.assertEqual(upgrade_schema(db.engine), [])
+
+    def test_migration_applied_by_another_process_is_skipped(self):
+        other = db.create_engine(db.engine.url)
+
+        def migrate_elsewhere(conn, cursor, statement, *args):
+            # Another worker finishes the migration after this one has read the version
+            if statement == 'BEGIN IMMEDIATE' and not upgraded:
+                upgraded.extend(upgrade_schema(other))
+
+        upgraded = []
+        event.listen(db.engine, 'before_cursor_execute', migrate_elsewhere)
+        try:
+            self.assertEqual(upgrade_schema(db.engine), [])
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', migrate_elsewhere)
+            other.dispose()
+        self.assertEqual([number for number, _ in upgraded], [6])
+        columns = [column['name'] for column in db.inspect(db.engine).get_columns('task')]
+        self.assertEqual(columns.count('reminded_at'), 1)
+
+
+class JobQueueTests(AppTestCase):
+    """
+    Тесты очереди фоновых заданий.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.queue = JobQueue(app, db, Job, retry_delay=0, lease=0.3)
+        self.calls = []
+
+    def test_job_runs_and_is_marked_done(self):
+        self.queue.handler('record')(self.calls.append)
+        job = self.queue.enqueue('record', {'value': 1})
+        db.session.commit()
+        self.assertEqual(self.queue.run_pending(), 1)
+        self.assertEqual(self.calls, [{'value': 1}])
+        db.session.refresh(job)
+        self.assertEqual(job.status, 'done')
+
+    def test_failed_job_is_retried_until_attempts_are_exhausted(self):
+        def fail(payload):
+            self.calls.append(payload)
+            raise RuntimeError('boom')
+
+        self.queue.handler('fail', max_attempts=2)(fail)
+        job = self.queue.enqueue('fail')
+        db.session.commit()
+        with self.assertLogs(app.logger, 'ERROR'):
+            self.assertEqual(self.queue.run_pending(), 2)
+        db.session.refresh(job)
+        self.assertEqual((job.status, job.attempts, len(self.calls)), ('failed', 2, 2))
+        self.assertIn('boom', job.last_error)
+
+    def test_idle_poll_does_not_write(self):
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            self.assertIsNone(self.queue._claim())
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertTrue(statements)
+        self.assertFalse([statement for statement in statements if statement.lstrip().upper().startswith('UPDATE')])
+
+    def test_job_with_expired_lease_is_claimed_again(self):
+        self.queue.handler('record')(self.calls.append)
+        stale = datetime.utcnow() - timedelta(seconds=1)
+        db.session.add(Job(name='record', status='running', attempts=1, updated_at=stale))
+        db.session.commit()
+        self.assertEqual(self.queue.run_pending(), 1)
+        self.assertEqual(self.calls, [{}])
+
+    def test_long_job_extends_its_lease(self):
+        claimed = []
+
+        def slow(payload):
+            time.sleep(self.queue.lease * 2)
+            claimed.append(self.queue._claim())
+
+        self.queue.handler('slow')(slow)
+        job = self.queue.enqueue('slow')
+        db.session.commit()
+        self.assertEqual(self.queue.run_pending(), 1)
+        self.assertEqual(claimed, [None])
+        db.session.refresh(job)
+        self.assertEqual((job.status, job.attempts), ('done', 1))
+
+
+class DeadlineReminderTests(AppTestCase):
+    """
+    Тесты напоминаний о сроках задач.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.user = User(username='user', email='user@test.ru', password='password')
+        db.session.add(self.user)
+        db.session.flush()
+        self.task = Task(name='Задача', category='Категория', data_end_plan=datetime.utcnow() + timedelta(hours=2),
+                         user_id=self.user.id)
+        db.session.add(self.task)
+        db.session.commit()
+
+    def reminders(self):
+        with self.assertLogs(app.logger, 'INFO') as logs:
+            jobs.run_pending()
+            app.logger.info('done')
+        return [line for line in logs.output if 'Напоминание' in line]
+
+    def test_task_queued_twice_is_reminded_once(self):
+        # The route and the deadline scan may both queue the same task
+        for _ in range(2):
+            jobs.enqueue('deadline-reminder', {'user_id': self.user.id, 'task_ids': [self.task.id]})
+        db.session.commit()
+        self.assertEqual(len(self.reminders()), 1)
+        db.session.refresh(self.task)
+        self.assertIsNotNone(self.task.reminded_at)
+
+    def test_scan_skips_reminded_tasks(self):
+        deadline_scan({})
+        self.assertEqual(len(self.reminders()), 1)
+        deadline_scan({})
+        self.assertEqual(self.reminders(), [])
+        self.assertEqual(Job.query.filter_by(name='deadline-reminder').count(), 1)
+
+
+class UserTasksTests(AppTestCase):
+    """
+    Тесты доступа к задачам через отношение User.tasks.
+    """
+
+    def setUp(self):
+        super().setUp()
+        identity_cache.invalidate(1)
+        db.session.add(User(id=1, username='user', email='user@test.ru', password='password'))
+        db.session.add(User(id=2, username='other', email='other@test.ru', password='password'))
+        for user_id in (1, 1, 2):
+            db.session.add(Task(name='Задача', category='Дом', data_end_plan=datetime.utcnow(), user_id=user_id))
+        db.session.commit()
+        db.session.remove()
+
+    def test_cached_user_tasks_are_queried_without_loading_the_user(self):
+        load_user('1')
+        db.session.remove()
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            user = load_user('1')
+            self.assertEqual(user.tasks.filter_by(category='Дом').count(), 2)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        self.assertEqual(len(statements), 1)
+        self.assertNotIn('FROM user', statements[0])
+
+
+class DashboardStreamTests(AppTestCase):
+    """
+    Тесты панели управления, отправляемой по частям.
+    """
+
+    def setUp(self):
+        super().setUp()
+        identity_cache.invalidate(1)
+        db.session.add(User(id=1, username='user', email='user@test.ru', password='password'))
+        db.session.execute(db.insert(Task), [
+            {'name': f'Задача {number}', 'category': 'Дом', 'data_end_plan': datetime.utcnow(), 'user_id': 1}
+            for number in range(1200)
+        ])
+        db.session.commit()
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = '1'
+
+    def test_open_stream_does_not_block_writers(self):
+        response = self.client.get('/dashboard?all=1')
+        chunks = iter(response.response)
+        next(chunks)
+        # The cursor of the page being sent is still open
+        writer = db.create_engine(db.engine.url, connect_args={'timeout': 0.1})
+        try:
+            with writer.begin() as connection:
+                connection.exec_driver_sql("UPDATE task SET status = 'выполнена' WHERE id = 1")
+        finally:
+            writer.dispose()
+        body = b''.join(chunks)
+        response.close()
+        self.assertIn('Задача 1199'.encode(), body)
+
+
+class BulkTasksTests(AppTestCase):
+    """
+    Тесты групповых действий над задачами.
+    """
+
+    def setUp(self):
+        super().setUp()
+        app.config['WTF_CSRF_ENABLED'] = False
+        identity_cache.invalidate(1)
+        db.session.add(User(id=1, username='user', email='user@test.ru', password='password'))
+        db.session.add(User(id=2, username='other', email='other@test.ru', password='password'))
+        self.deadline = datetime(2030, 1, 1, 10, 30, 15, 123456)
+        for task_id, user_id in ((1, 1), (2, 1), (3, 2)):
+            db.session.add(Task(id=task_id, name='Задача', category='Дом', data_end_plan=self.deadline,
+                                user_id=user_id))
+        db.session.commit()
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = '1'
+
+    def tearDown(self):
+        app.config['WTF_CSRF_ENABLED'] = True
+        super().tearDown()
+
+    def bulk(self, action, task_ids, days=1):
+        response = self.client.post('/tasks/bulk', data={'action': action, 'days': days, 'task_ids': task_ids})
+        self.assertEqual(response.status_code, 302)
+        db.session.expire_all()
+        return {task.id: task for task in Task.query.all()}
+
+    def test_postpone_keeps_fractional_seconds(self):
+        tasks = self.bulk('postpone', ['1', '2'], days=3)
+        self.assertEqual(tasks[1].data_end_plan, self.deadline + timedelta(days=3))
+        self.assertEqual(tasks[2].data_end_plan, self.deadline + timedelta(days=3))
+
+    def test_other_users_tasks_are_untouched(self):
+        tasks = self.bulk('postpone', ['1', '3'])
+        self.assertEqual(tasks[1].data_end_plan, self.deadline + timedelta(days=1))
+        self.assertEqual(tasks[3].data_end_plan, self.deadline)
+        tasks = self.bulk('delete', ['2', '3'])
+        self.assertEqual(sorted(tasks), [1, 3])
+
+    def test_malformed_ids_are_rejected(self):
+        tasks = self.bulk('delete', ['1', 'x'])
+        self.assertEqual(sorted(tasks), [1, 2, 3])
+        with self.client.session_transaction() as session:
+            self.assertEqual(session['_flashes'], [('danger', 'Неверный номер задачи')])
+
+
+class CategoryTrieTests(unittest.TestCase):
+    """
+    Тесты префиксного дерева категорий.
+    """
+
+    def setUp(self):
+        self.trie = CategoryTrie()
+        for name, count in [('Работа', 5), ('работа', 1), ('Ремонт', 3), ('Дом', 2)]:
+            self.trie.add(name, count)
+
+    def test_completions_are_ordered_by_task_count(self):
+        self.assertEqual(self.trie.complete('р', 10), [('Работа', 6), ('Ремонт', 3)])
+        self.assertEqual(self.trie.complete('Р', 1), [('Работа', 6)])
+        self.assertEqual(self.trie.complete('х', 10), [])
+
+    def test_canonical_spelling_is_the_most_common(self):
+        self.assertEqual(self.trie.canonical('РАБОТА'), 'Работа')
+        self.assertIsNone(self.trie.canonical('Раб'))
+
+    def test_change_updates_cached_completions(self):
+        self.trie.complete('р', 10)
+        self.trie.add('Ремонт', 4)
+        self.assertEqual(self.trie.complete('р', 10), [('Ремонт', 7), ('Работа', 6)])
+
+    def test_removed_category_is_pruned(self):
+        self.trie.add('Дом', -2)
+        self.assertEqual(self.trie.complete('д', 10), [])
+        self.assertNotIn('д', self.trie.root.children)
+
+
+class CategoryIndexTests(AppTestCase):
+    """
+    Тесты подсказок категорий пользователей.
+    """
+
+    def setUp(self):
+        super().setUp()
+        category_index.invalidate(1)
+        self.user = User(id=1, username='user', email='user@test.ru', password='password')
+        db.session.add(self.user)
+        db.session.add(self.task('Работа'))
+        db.session.commit()
+
+    def task(self, category):
+        return Task(name='Задача', category=category, data_end_plan=datetime.utcnow(), user_id=self.user.id)
+
+    def test_change_made_during_load_is_not_lost(self):
+        def load(user_id):
+            # A transaction commits while the trie is being loaded
+            index.change(user_id, 'Дом', 1)
+            return [('Работа', 1)]
+
+        index = CategoryIndex(load, maxsize=10, ttl=60)
+        index.suggest(1, '')
+        index.suggest(1, '')
+        self.assertEqual(index.builds, 2)
+
+    def test_changes_are_applied_on_commit(self):
+        self.assertEqual(category_index.suggest(self.user.id, ''), [('Работа', 1)])
+        db.session.add(self.task('Дом'))
+        db.session.flush()
+        self.assertEqual(category_index.suggest(self.user.id, ''), [('Работа', 1)])
+        db.session.commit()
+        self.assertEqual(category_index.suggest(self.user.id, ''), [('Работа', 1), ('Дом', 1)])
+
+    def test_changes_are_discarded_on_rollback(self):
+        category_index.suggest(self.user.id, '')
+        db.session.add(self.task('Дом'))
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(category_index.suggest(self.user.id, ''), [('Работа', 1)])
+
+
+if __name__ == '__main__':
+    unittest.main()
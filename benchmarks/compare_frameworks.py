@@ -0,0 +1,343 @@
+"""
+Сравнение приложений Flask, Django и FastAPI на одинаковых сценариях.
+
+Для каждого приложения создаётся база SQLite с одинаковыми сгенерированными
+данными, приложение запускается локально (Flask и Django - gunicorn, FastAPI -
+uvicorn) через фабрики benchmarks/instrument.py, после чего по очереди
+выполняются сценарии: вход, панель управления, фильтр, добавление, изменение
+и удаление задачи. Для каждого сценария и уровня параллельности в JSON-отчёт
+попадают пропускная способность, перцентили задержки, число SQL-запросов на
+запрос и резидентная память процессов сервера.
+
+Запуск из корня репозитория (нужны gunicorn, uvicorn и httpx):
+
+    python benchmarks/compare_frameworks.py --concurrency 10 50 --duration 10 --output report.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from loadgen import LoadResult, Server, client, run_command  # noqa: E402
+
+REPO_DIR = os.path.dirname(BENCH_DIR)
+PASSWORD = 'benchpassword'
+PREFIX = 'benchuser'
+SCENARIOS = ('login', 'dashboard', 'filter', 'add', 'edit', 'delete')
+# Interval of server memory sampling, in seconds
+RSS_INTERVAL = 0.25
+
+
+def csrf_token(html):
+    """
+    Значение скрытого поля csrf_token формы Flask-WTF.
+    """
+    return re.search(r'name="csrf_token" type="hidden" value="([^"]+)"', html).group(1)
+
+
+class FlaskApp:
+    """
+    Сценарии приложения Flask (Flask/app.py).
+    """
+    name = 'flask'
+    directory = os.path.join(REPO_DIR, 'Flask')
+    task_id_pattern = r'/task/(\d+)/update'
+    redirect = (302,)
+
+    def __init__(self, tmp, workers):
+        self.env = {'FLASK_DATABASE_URI': 'sqlite:///' + os.path.join(tmp, 'flask.sqlite3')}
+        self.command = [sys.executable, '-m', 'gunicorn', 'instrument:flask_app()', '--pythonpath', BENCH_DIR,
+                        '--bind', '127.0.0.1:{port}', '--worker-class', 'gthread', '--threads', '32',
+                        '--workers', str(workers)]
+
+    def seed(self, users, tasks_per_user, seed):
+        run_command([sys.executable, '-m', 'flask', '--app', 'app', 'generate-data', '--users', str(users),
+                     '--tasks-per-user', str(tasks_per_user), '--seed', str(seed), '--prefix', PREFIX,
+                     '--password', PASSWORD], self.directory, self.env)
+
+    async def login(self, session, user, result=None):
+        form = await session.get('/login')
+        data = {'csrf_token': csrf_token(form.text), 'email': f'{PREFIX}{user}@test.ru', 'password': PASSWORD}
+        return await self._timed(result, 'login', session.post('/login', data=data))
+
+    async def prepare(self, session):
+        session.csrf_token = csrf_token((await session.get('/task/new')).text)
+
+    def task_data(self, session, rng):
+        return {'csrf_token': session.csrf_token, 'name': f'Bench task {rng.randrange(10 ** 6)}',
+                'description': 'Benchmark task', 'category': 'bench', 'data_end_plan': '2030-01-01',
+                'status': 'в работе'}
+
+    def dashboard(self, session):
+        return session.get('/dashboard')
+
+    filter = None
+
+    def add(self, session, rng):
+        return session.post('/task/new', data=self.task_data(session, rng))
+
+    def edit(self, session, task_id, rng):
+        return session.post(f'/task/{task_id}/update', data=self.task_data(session, rng))
+
+    def delete(self, session, task_id):
+        return session.post(f'/task/{task_id}/delete')
+
+    async def _timed(self, result, name, request):
+        if result is None:
+            return await request
+        return await result.timed(name, request, self.redirect)
+
+
+class DjangoApp(FlaskApp):
+    """
+    Сценарии приложения Django (djangomike) под WSGI.
+    """
+    name = 'django'
+    directory = os.path.join(REPO_DIR, 'Django')
+    task_id_pattern = r'/edit_task/(\d+)/'
+
+    def __init__(self, tmp, workers):
+        self.env = {'DJANGO_DB_NAME': os.path.join(tmp, 'django.sqlite3'), 'DJANGO_ASYNC_VIEWS': '0'}
+        self.command = [sys.executable, '-m', 'gunicorn', 'instrument:django_app()', '--pythonpath', BENCH_DIR,
+                        '--bind', '127.0.0.1:{port}', '--worker-class', 'gthread', '--threads', '32',
+                        '--workers', str(workers)]
+
+    def seed(self, users, tasks_per_user, seed):
+        run_command([sys.executable, 'manage.py', 'migrate', '-v0'], self.directory, self.env)
+        run_command([sys.executable, 'manage.py', 'generate_data', '--users', str(users), '--tasks-per-user',
+                     str(tasks_per_user), '--seed', str(seed), '--prefix', PREFIX, '--password', PASSWORD],
+                    self.directory, self.env)
+
+    async def login(self, session, user, result=None):
+        await session.get('/login/')
+        request = session.post('/login/', data={'username': f'{PREFIX}{user}', 'password': PASSWORD},
+                               headers={'X-CSRFToken': session.cookies['csrftoken']})
+        return await self._timed(result, 'login', request)
+
+    async def prepare(self, session):
+        form = await session.get('/add_task/')
+        session.categories = [int(value) for value in re.findall(r'<option value="(\d+)"', form.text)]
+
+    def task_data(self, session, rng):
+        return {'name': f'Bench task {rng.randrange(10 ** 6)}', 'description': 'Benchmark task',
+                'category': rng.choice(session.categories), 'data_end_plan': '2030-01-01',
+                'status': 'in_progress'}
+
+    def _post(self, session, url, data=None):
+        return session.post(url, data=data, headers={'X-CSRFToken': session.cookies['csrftoken']})
+
+    def dashboard(self, session):
+        return session.get('/dashboard/')
+
+    def add(self, session, rng):
+        return self._post(session, '/add_task/', self.task_data(session, rng))
+
+    def edit(self, session, task_id, rng):
+        return self._post(session, f'/edit_task/{task_id}/', self.task_data(session, rng))
+
+    def delete(self, session, task_id):
+        return self._post(session, f'/delete_task/{task_id}/')
+
+
+class FastAPIApp(FlaskApp):
+    """
+    Сценарии приложения FastAPI (Fastapi/fastapi_mike/main.py).
+    """
+    name = 'fastapi'
+    directory = os.path.join(REPO_DIR, 'Fastapi', 'fastapi_mike')
+    task_id_pattern = r'/edit-task/(\d+)'
+    redirect = (303,)
+
+    def __init__(self, tmp, workers):
+        self.env = {'FASTAPI_DB_PATH': os.path.join(tmp, 'fastapi.db')}
+        self.command = [sys.executable, '-m', 'uvicorn', '--factory', 'instrument:fastapi_app', '--app-dir',
+                        BENCH_DIR, '--port', '{port}', '--workers', str(workers), '--log-level', 'warning']
+
+    def seed(self, users, tasks_per_user, seed):
+        run_command([sys.executable, 'generate_data.py', '--users', str(users), '--tasks-per-user',
+                     str(tasks_per_user), '--seed', str(seed), '--prefix', PREFIX, '--password', PASSWORD],
+                    self.directory, self.env)
+
+    async def login(self, session, user, result=None):
+        request = session.post('/login', data={'username': f'{PREFIX}{user}', 'password': PASSWORD})
+        return await self._timed(result, 'login', request)
+
+    async def prepare(self, session):
+        pass
+
+    def task_data(self, session, rng):
+        return {'name': f'Bench task {rng.randrange(10 ** 6)}', 'description': 'Benchmark task',
+                'category': 'bench', 'data_end_plan': '2030-01-01T00:00:00', 'status': 'in_progress'}
+
+    def dashboard(self, session):
+        return session.get('/dashboard')
+
+    def filter(self, session, rng):
+        return session.get('/filter-tasks', params={'status': rng.choice(['planned', 'in_progress', 'completed'])})
+
+    def add(self, session, rng):
+        return session.post('/add-task', data=self.task_data(session, rng))
+
+    def edit(self, session, task_id, rng):
+        return session.post(f'/edit-task/{task_id}', data=self.task_data(session, rng))
+
+    def delete(self, session, task_id):
+        return session.post(f'/delete-task/{task_id}')
+
+
+APPS = {app.name: app for app in (FlaskApp, DjangoApp, FastAPIApp)}
+
+
+async def open_sessions(app, server, concurrency, users):
+    """
+    Открывает concurrency клиентских сессий, вошедших под пользователями benchuser0..users-1,
+    и собирает идентификаторы задач каждого пользователя с его панели управления.
+    """
+    sessions = [client(server.base_url) for _ in range(concurrency)]
+    task_ids = {}
+    for number, session in enumerate(sessions):
+        session.user = number % users
+        await app.login(session, session.user)
+        await app.prepare(session)
+        if session.user not in task_ids:
+            dashboard = await app.dashboard(session)
+            dashboard.raise_for_status()
+            task_ids[session.user] = [int(task_id) for task_id in re.findall(app.task_id_pattern, dashboard.text)]
+    for session in sessions:
+        session.task_ids = task_ids[session.user]
+    return sessions
+
+
+async def run_scenario(app, server, scenario, sessions, duration, seed):
+    """
+    Выполняет один сценарий всеми сессиями в течение duration секунд.
+    Возвращает сводку по сценарию с пиковой памятью сервера.
+    """
+    result = LoadResult()
+    rng = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+
+    async def step(session):
+        if scenario == 'login':
+            session.cookies.clear()
+            await app.login(session, session.user, result)
+        elif scenario == 'dashboard':
+            await result.timed(scenario, app.dashboard(session), (200,))
+        elif scenario == 'filter':
+            await result.timed(scenario, app.filter(session, rng), (200,))
+        elif scenario == 'add':
+            await result.timed(scenario, app.add(session, rng), app.redirect)
+        elif scenario == 'edit':
+            await result.timed(scenario, app.edit(session, rng.choice(session.task_ids), rng), app.redirect)
+        elif session.task_ids:
+            # Sessions of the same user share its task list, so every task is deleted once
+            await result.timed(scenario, app.delete(session, session.task_ids.pop()))
+        else:
+            return False
+        return True
+
+    async def worker(session):
+        while loop.time() < deadline and await step(session):
+            pass
+
+    rss = []
+
+    async def sample_rss():
+        while True:
+            rss.append(server.rss_bytes())
+            await asyncio.sleep(RSS_INTERVAL)
+
+    # The login scenario replaces the session cookies (and CSRF tokens bound to them), the
+    # logged-in state prepared by open_sessions is restored for the following scenarios
+    cookies = [httpx.Cookies(session.cookies) for session in sessions]
+    sampler = asyncio.create_task(sample_rss())
+    start = loop.time()
+    try:
+        await asyncio.gather(*(worker(session) for session in sessions))
+    finally:
+        sampler.cancel()
+        for session, saved in zip(sessions, cookies):
+            session.cookies = saved
+    elapsed = loop.time() - start
+    summary = result.summary(elapsed).get(scenario, {'requests': 0, 'errors': 0})
+    summary['rss_peak_bytes'] = max(rss)
+    summary['rss_end_bytes'] = server.rss_bytes()
+    return summary
+
+
+async def measure(app, server, scenarios, concurrency, users, duration, seed):
+    sessions = await open_sessions(app, server, concurrency, users)
+    try:
+        return {scenario: await run_scenario(app, server, scenario, sessions, duration, seed)
+                for scenario in scenarios}
+    finally:
+        await asyncio.gather(*(session.aclose() for session in sessions))
+
+
+def git_revision():
+    completed = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True)
+    return completed.stdout.strip() or None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frameworks', nargs='+', choices=list(APPS), default=list(APPS), help='приложения')
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS), help='сценарии')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50], help='числа одновременных клиентов')
+    parser.add_argument('--duration', type=float, default=10, help='длительность каждого сценария, с')
+    parser.add_argument('--users', type=int, default=50, help='количество пользователей')
+    parser.add_argument('--tasks-per-user', type=int, default=200, help='количество задач на пользователя')
+    parser.add_argument('--workers', type=int, default=1, help='число рабочих процессов сервера')
+    parser.add_argument('--seed', type=int, default=42, help='начальное значение генератора случайных чисел')
+    parser.add_argument('--output', help='файл для JSON-отчёта (по умолчанию stdout)')
+    args = parser.parse_args()
+
+    report = {
+        'meta': {
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            **{key: value for key, value in vars(args).items() if key != 'output'},
+        },
+        'results': {},
+    }
+    for name in args.frameworks:
+        with tempfile.TemporaryDirectory() as tmp:
+            app = APPS[name](tmp, args.workers)
+            app.seed(args.users, args.tasks_per_user, args.seed)
+            scenarios = [scenario for scenario in args.scenarios if scenario != 'filter' or app.filter is not None]
+            with Server(app.command, app.directory, app.env) as server:
+                report['results'][name] = {
+                    'unsupported': [scenario for scenario in args.scenarios if scenario not in scenarios],
+                    **{
+                        str(concurrency): asyncio.run(
+                            measure(app, server, scenarios, concurrency, args.users, args.duration, args.seed)
+                        )
+                        for concurrency in args.concurrency
+                    },
+                }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
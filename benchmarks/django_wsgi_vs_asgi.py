@@ -0,0 +1,103 @@
+"""
+Сравнение пропускной способности Django под WSGI (gunicorn, синхронные
+представления) и под ASGI (uvicorn, асинхронные представления).
+
+Запуск из корня репозитория (нужны gunicorn, uvicorn и httpx):
+
+    python benchmarks/django_wsgi_vs_asgi.py --concurrency 50 200 --duration 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from loadgen import Server, client, drive, run_command  # noqa: E402
+
+DJANGO_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Django')
+PASSWORD = 'benchpassword'
+
+SERVERS = {
+    'wsgi': [sys.executable, '-m', 'gunicorn', 'djangomike.wsgi:application', '--bind', '127.0.0.1:{port}',
+             '--worker-class', 'gthread', '--threads', '32'],
+    'asgi': [sys.executable, '-m', 'uvicorn', 'djangomike.asgi:application', '--port', '{port}',
+             '--log-level', 'warning'],
+}
+
+
+async def login(base_url, username):
+    """
+    Входит в систему и возвращает cookie сессии и идентификаторы задач пользователя.
+    """
+    async with client(base_url) as session:
+        await session.get('/login/')
+        token = session.cookies['csrftoken']
+        await session.post('/login/', data={'username': username, 'password': PASSWORD},
+                           headers={'X-CSRFToken': token})
+        dashboard = await session.get('/dashboard/')
+        dashboard.raise_for_status()
+        task_ids = [int(task_id) for task_id in re.findall(r'/edit_task/(\d+)/', dashboard.text)]
+        return dict(session.cookies), task_ids
+
+
+async def measure(base_url, users, concurrency, duration, seed):
+    accounts = await asyncio.gather(*(login(base_url, f'benchuser{i}') for i in range(users)))
+    sessions = [client(base_url, cookies=accounts[i % users][0]) for i in range(concurrency)]
+    for session, (_, task_ids) in zip(sessions, (accounts[i % users] for i in range(concurrency))):
+        session.task_ids = task_ids
+    rng = random.Random(seed)
+
+    async def scenario(session, result):
+        await result.timed('dashboard', session.get('/dashboard/'))
+        await result.timed('edit_task', session.get(f'/edit_task/{rng.choice(session.task_ids)}/'))
+
+    try:
+        return await drive(scenario, sessions, duration)
+    finally:
+        await asyncio.gather(*(session.aclose() for session in sessions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[50, 200], help='числа одновременных клиентов')
+    parser.add_argument('--duration', type=float, default=20, help='длительность каждого замера, с')
+    parser.add_argument('--users', type=int, default=20, help='количество пользователей')
+    parser.add_argument('--tasks-per-user', type=int, default=500, help='количество задач на пользователя')
+    parser.add_argument('--seed', type=int, default=42, help='начальное значение генератора случайных чисел')
+    parser.add_argument('--output', help='файл для JSON-отчёта (по умолчанию stdout)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {'DJANGO_DB_NAME': os.path.join(tmp, 'bench.sqlite3')}
+        manage = [sys.executable, 'manage.py']
+        run_command([*manage, 'migrate', '-v0'], DJANGO_DIR, env)
+        run_command([*manage, 'generate_data', '--users', str(args.users), '--tasks-per-user',
+                     str(args.tasks_per_user), '--seed', str(args.seed), '--prefix', 'benchuser',
+                     '--password', PASSWORD], DJANGO_DIR, env)
+
+        report = {}
+        for interface, command in SERVERS.items():
+            server_env = {**env, 'DJANGO_ASYNC_VIEWS': '1' if interface == 'asgi' else '0'}
+            with Server(command, DJANGO_DIR, server_env) as server:
+                report[interface] = {
+                    str(concurrency): asyncio.run(
+                        measure(server.base_url, args.users, concurrency, args.duration, args.seed)
+                    )
+                    for concurrency in args.concurrency
+                }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
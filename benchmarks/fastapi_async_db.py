@@ -0,0 +1,141 @@
+"""
+Задержки FastAPI-приложения при большом числе одновременных клиентов до и
+после изменения слоя доступа к данным.
+
+Сравниваются две ревизии каталога Fastapi/fastapi_mike (git-ссылки или
+рабочая копия). Несколько клиентов непрерывно открывают тяжёлую панель
+управления пользователя с большим числом задач, остальные выполняют лёгкие
+запросы; отчёт показывает, насколько тяжёлые запросы ухудшают p99 лёгких.
+
+Запуск из корня репозитория (нужны uvicorn и httpx):
+
+    python benchmarks/fastapi_async_db.py --before <commit> --concurrency 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from loadgen import Server, client, drive, run_command  # noqa: E402
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = 'Fastapi/fastapi_mike'
+# Code shared by the applications, imported by main from the repository root
+SHARED_PATHS = ['common']
+PASSWORD = 'benchpassword'
+
+
+def checkout(ref, target):
+    """
+    Копирует приложение и общий код из git-ссылки ref (или из рабочей копии, если ref равен
+    'worktree') в target, сохраняя расположение каталогов репозитория, и возвращает каталог приложения.
+    """
+    app_dir = os.path.join(target, APP_PATH)
+    if ref == 'worktree':
+        for path in [APP_PATH, *SHARED_PATHS]:
+            if os.path.isdir(os.path.join(REPO_DIR, path)):
+                shutil.copytree(os.path.join(REPO_DIR, path), os.path.join(target, path),
+                                ignore=shutil.ignore_patterns('*.db', 'venv', '.idea', '__pycache__'))
+        return app_dir
+    # Older revisions predate the shared code, only the paths present in ref are archived
+    listed = subprocess.run(['git', 'ls-tree', '--name-only', ref, *SHARED_PATHS], cwd=REPO_DIR,
+                            capture_output=True, text=True, check=True)
+    archive = subprocess.run(['git', 'archive', ref, APP_PATH, *listed.stdout.split()], cwd=REPO_DIR,
+                             capture_output=True, check=True)
+    subprocess.run(['tar', '-x', '-C', target], input=archive.stdout, check=True)
+    for name in os.listdir(app_dir):
+        if name.endswith('.db'):
+            os.remove(os.path.join(app_dir, name))
+    return app_dir
+
+
+async def login(base_url, username):
+    """
+    Входит в систему и возвращает cookie сессии и идентификаторы задач пользователя.
+    """
+    async with client(base_url) as session:
+        await session.post('/login', data={'username': username, 'password': PASSWORD})
+        if 'session' not in session.cookies:
+            raise RuntimeError(f'login failed for {username}')
+        dashboard = await session.get('/dashboard')
+        dashboard.raise_for_status()
+        return dict(session.cookies), [int(task_id) for task_id in re.findall(r'/edit-task/(\d+)', dashboard.text)]
+
+
+async def measure(base_url, users, concurrency, heavy_clients, duration, seed):
+    heavy_cookies, _ = await login(base_url, 'heavyuser0')
+    accounts = await asyncio.gather(*(login(base_url, f'benchuser{i}') for i in range(users)))
+    sessions = []
+    for i in range(concurrency):
+        if i < heavy_clients:
+            session = client(base_url, cookies=heavy_cookies)
+            session.heavy = True
+        else:
+            cookies, task_ids = accounts[i % users]
+            session = client(base_url, cookies=cookies)
+            session.heavy, session.task_ids = False, task_ids
+        sessions.append(session)
+    rng = random.Random(seed)
+
+    async def scenario(session, result):
+        if session.heavy:
+            await result.timed('heavy_dashboard', session.get('/dashboard'))
+        else:
+            await result.timed('edit_task', session.get(f'/edit-task/{rng.choice(session.task_ids)}'))
+            await result.timed('dashboard', session.get('/dashboard'))
+
+    try:
+        return await drive(scenario, sessions, duration)
+    finally:
+        await asyncio.gather(*(session.aclose() for session in sessions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--before', required=True, help='git-ссылка ревизии «до»')
+    parser.add_argument('--after', default='worktree', help="git-ссылка ревизии «после» (по умолчанию рабочая копия)")
+    parser.add_argument('--concurrency', type=int, default=200, help='число одновременных клиентов')
+    parser.add_argument('--heavy-clients', type=int, default=5, help='число клиентов с тяжёлыми запросами')
+    parser.add_argument('--heavy-tasks', type=int, default=20000, help='задач у пользователя с тяжёлой панелью')
+    parser.add_argument('--users', type=int, default=20, help='количество обычных пользователей')
+    parser.add_argument('--tasks-per-user', type=int, default=50, help='задач у обычного пользователя')
+    parser.add_argument('--duration', type=float, default=20, help='длительность замера, с')
+    parser.add_argument('--seed', type=int, default=42, help='начальное значение генератора случайных чисел')
+    parser.add_argument('--output', help='файл для JSON-отчёта (по умолчанию stdout)')
+    args = parser.parse_args()
+
+    report = {}
+    for label, ref in (('before', args.before), ('after', args.after)):
+        with tempfile.TemporaryDirectory() as root:
+            app_dir = checkout(ref, root)
+            generate = [sys.executable, 'generate_data.py', '--seed', str(args.seed), '--password', PASSWORD]
+            run_command([*generate, '--prefix', 'heavyuser', '--users', '1', '--tasks-per-user',
+                         str(args.heavy_tasks)], app_dir)
+            run_command([*generate, '--prefix', 'benchuser', '--users', str(args.users), '--tasks-per-user',
+                         str(args.tasks_per_user)], app_dir)
+            command = [sys.executable, '-m', 'uvicorn', 'main:app', '--port', '{port}', '--log-level', 'warning']
+            with Server(command, app_dir) as server:
+                report[label] = {
+                    'ref': ref,
+                    'results': asyncio.run(measure(server.base_url, args.users, args.concurrency,
+                                                   args.heavy_clients, args.duration, args.seed)),
+                }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Память и время до первого байта полной панели управления Flask
+(/dashboard?all=1) при потоковом и буферизованном рендеринге.
+
+Для каждого размера списка создаётся пользователь с заданным числом задач во
+временной базе данных, после чего страница запрашивается через тестовый клиент
+Flask в обоих режимах (FLASK_DASHBOARD_STREAM). Тело ответа читается по частям,
+как это делает WSGI-сервер; пик выделенной памяти за запрос измеряется
+tracemalloc. При потоковом рендеринге пик не должен зависеть от числа задач.
+
+Запуск из корня репозитория:
+
+    python benchmarks/flask_dashboard_stream.py --tasks 1000 10000 50000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(REPO_DIR, 'Flask')
+
+
+def generate(env, prefix, tasks):
+    """
+    Создаёт одного пользователя с tasks задачами и возвращает его имя.
+    """
+    subprocess.run(
+        [sys.executable, '-m', 'flask', '--app', 'app', 'generate-data', '--users', '1',
+         '--tasks-per-user', str(tasks), '--prefix', prefix],
+        cwd=APP_DIR, env=env, check=True, capture_output=True,
+    )
+    return f'{prefix}0'
+
+
+def measure(app, user_id, stream, repeat):
+    """
+    Запрашивает полную панель пользователя repeat раз и возвращает лучшие показатели.
+    """
+    app.config['DASHBOARD_STREAM'] = stream
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    best = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        start = time.perf_counter()
+        response = client.get('/dashboard?all=1', buffered=False)
+        first_byte = None
+        size = 0
+        for chunk in response.response:
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+        response.close()
+        total = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        result = {
+            'ttfb_ms': round(first_byte * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+            'peak_memory_kib': round(peak / 1024),
+            'body_kib': round(size / 1024),
+        }
+        if best is None or result['total_ms'] < best['total_ms']:
+            best = result
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, nargs='+', default=[1000, 10000, 50000],
+                        help='размеры списка задач пользователя')
+    parser.add_argument('--repeat', type=int, default=3, help='число повторов каждого замера')
+    parser.add_argument('--output', help='файл для JSON-отчёта (по умолчанию stdout)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, FLASK_DATABASE_URI=f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+        usernames = {tasks: generate(env, f'stream{tasks}_', tasks) for tasks in args.tasks}
+
+        os.environ['FLASK_DATABASE_URI'] = env['FLASK_DATABASE_URI']
+        sys.path.insert(0, APP_DIR)
+        from app import User, app
+
+        results = []
+        for tasks, username in usernames.items():
+            with app.app_context():
+                user_id = User.query.filter_by(username=username).one().id
+            for stream in (False, True):
+                results.append({
+                    'tasks': tasks,
+                    'mode': 'stream' if stream else 'buffered',
+                    **measure(app, user_id, stream, args.repeat),
+                })
+                print(json.dumps(results[-1], ensure_ascii=False), file=sys.stderr)
+
+    output = json.dumps({'results': results}, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Фабрики приложений Flask, Django и FastAPI для нагрузочного тестирования.
+
+Каждая фабрика подсчитывает SQL-запросы, выполненные при обработке HTTP-запроса,
+и возвращает их число в заголовке ответа X-Query-Count. Код приложений при этом
+не меняется. Заголовки отправляются до тела ответа, поэтому ответ без
+Content-Length (потоковый), тело которого ещё может обращаться к базе данных,
+помечается значением X-Query-Count: streamed вместо заниженного числа.
+Запуск (из каталога приложения):
+
+    gunicorn 'instrument:flask_app()' --pythonpath <benchmarks>
+    gunicorn 'instrument:django_app()' --pythonpath <benchmarks>
+    uvicorn --factory instrument:fastapi_app --app-dir <benchmarks>
+"""
+import contextvars
+import os
+
+QUERY_COUNT_HEADER = 'X-Query-Count'
+QUERY_COUNT_STREAMED = 'streamed'
+
+_queries = contextvars.ContextVar('queries', default=None)
+
+
+def count_query(*args, **kwargs):
+    """
+    Увеличивает счётчик запросов текущего HTTP-запроса (обработчик before_cursor_execute).
+    """
+    counter = _queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def query_count_value(headers, count):
+    """
+    Значение заголовка X-Query-Count для ответа с заголовками headers (пары строк).
+    """
+    if any(name.lower() == 'content-length' for name, _ in headers):
+        return str(count)
+    return QUERY_COUNT_STREAMED
+
+
+def _django_execute_wrapper(execute, sql, params, many, context):
+    count_query()
+    return execute(sql, params, many, context)
+
+
+class WSGIQueryCounter:
+    """
+    WSGI-обёртка, добавляющая к ответу число выполненных SQL-запросов.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def __call__(self, environ, start_response):
+        counter = [0]
+        token = _queries.set(counter)
+
+        def counting_start_response(status, headers, exc_info=None):
+            headers.append((QUERY_COUNT_HEADER, query_count_value(headers, counter[0])))
+            return start_response(status, headers, exc_info)
+
+        try:
+            return self.app(environ, counting_start_response)
+        finally:
+            _queries.reset(token)
+
+
+class ASGIQueryCounter:
+    """
+    ASGI-обёртка, добавляющая к ответу число выполненных SQL-запросов.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        counter = [0]
+        token = _queries.set(counter)
+
+        async def counting_send(message):
+            if message['type'] == 'http.response.start':
+                headers = message.get('headers', [])
+                value = query_count_value([(name.decode('latin-1'), '') for name, _ in headers], counter[0])
+                header = (QUERY_COUNT_HEADER.lower().encode(), value.encode())
+                message = {**message, 'headers': [*headers, header]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, counting_send)
+        finally:
+            _queries.reset(token)
+
+
+def flask_app():
+    """
+    Приложение Flask (Flask/app.py).
+    """
+    from sqlalchemy import event
+
+    from app import app, db
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+    return WSGIQueryCounter(app)
+
+
+def django_app():
+    """
+    Приложение Django (djangomike) под WSGI.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'djangomike.settings')
+    from django.core.wsgi import get_wsgi_application
+    from django.db.backends.signals import connection_created
+
+    application = get_wsgi_application()
+
+    def install_wrapper(sender, connection, **kwargs):
+        # The signal fires on every reconnect of the same per-thread connection object
+        if _django_execute_wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_django_execute_wrapper)
+
+    connection_created.connect(install_wrapper, weak=False)
+    return WSGIQueryCounter(application)
+
+
+def fastapi_app():
+    """
+    Приложение FastAPI (Fastapi/fastapi_mike/main.py).
+    """
+    from sqlalchemy import event
+
+    import main
+
+    event.listen(main.async_engine.sync_engine, 'before_cursor_execute', count_query)
+    return ASGIQueryCounter(main.app)
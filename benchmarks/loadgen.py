@@ -0,0 +1,191 @@
+"""
+Общие средства нагрузочного тестирования: запуск сервера приложения,
+генерация нагрузки асинхронными HTTP-клиентами и расчёт перцентилей задержки.
+"""
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+from instrument import QUERY_COUNT_HEADER, QUERY_COUNT_STREAMED
+
+
+def free_port():
+    """
+    Возвращает свободный TCP-порт на 127.0.0.1.
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, q):
+    """
+    Перцентиль q (0-100) по отсортированному списку значений.
+    """
+    if not values:
+        return None
+    index = min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))
+    return values[index]
+
+
+class Server:
+    """
+    Процесс HTTP-сервера приложения, запускаемый на время замера.
+    """
+
+    def __init__(self, command, cwd, env=None, port=None):
+        self.port = port or free_port()
+        self.command = [part.format(port=self.port) for part in command]
+        self.cwd = cwd
+        self.env = {**os.environ, **(env or {})}
+        self.process = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            self.command, cwd=self.cwd, env=self.env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, start_new_session=True,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'{self.command[0]} exited: {self.process.stderr.read().decode()[-2000:]}')
+            try:
+                socket.create_connection(('127.0.0.1', self.port), timeout=0.2).close()
+                return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__(None, None, None)
+        raise RuntimeError(f'{self.command[0]} did not start listening on port {self.port}')
+
+    def __exit__(self, *exc_info):
+        if self.process and self.process.poll() is None:
+            os.killpg(self.process.pid, signal.SIGTERM)
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                os.killpg(self.process.pid, signal.SIGKILL)
+                self.process.wait()
+
+    def rss_bytes(self):
+        """
+        Суммарный резидентный объём памяти процесса сервера и его дочерних процессов (Linux).
+        """
+        total = 0
+        for pid in [self.process.pid, *_children(self.process.pid)]:
+            try:
+                with open(f'/proc/{pid}/statm') as statm:
+                    total += int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+            except (FileNotFoundError, ProcessLookupError):
+                pass
+        return total
+
+
+def _children(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as children:
+            pids = [int(child) for child in children.read().split()]
+    except FileNotFoundError:
+        return []
+    return pids + [grandchild for child in pids for grandchild in _children(child)]
+
+
+class LoadResult:
+    """
+    Накопитель задержек, ошибок и числа SQL-запросов по типам запросов.
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.queries = defaultdict(list)
+        self.uncounted = Counter()
+
+    async def timed(self, name, request, expect=None):
+        """
+        Выполняет запрос, учитывая его задержку под именем name. Ответ с кодом 4xx/5xx
+        или (если задан expect) с кодом не из expect считается ошибкой.
+        """
+        start = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError:
+            self.errors[name] += 1
+            return None
+        self.latencies[name].append(time.perf_counter() - start)
+        if response.status_code >= 400 or (expect is not None and response.status_code not in expect):
+            self.errors[name] += 1
+        if response.headers.get(QUERY_COUNT_HEADER) == QUERY_COUNT_STREAMED:
+            self.uncounted[name] += 1
+        elif QUERY_COUNT_HEADER in response.headers:
+            self.queries[name].append(int(response.headers[QUERY_COUNT_HEADER]))
+        return response
+
+    def summary(self, elapsed):
+        """
+        Пропускная способность и перцентили задержки (в миллисекундах) по типам запросов.
+        """
+        report = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies[name])
+            report[name] = {
+                'requests': len(values),
+                'errors': self.errors[name],
+                'throughput_rps': round(len(values) / elapsed, 1),
+                **{
+                    f'p{q}_ms': None if not values else round(percentile(values, q) * 1000, 2)
+                    for q in (50, 95, 99)
+                },
+            }
+            if self.queries[name]:
+                report[name]['sql_queries_mean'] = round(sum(self.queries[name]) / len(self.queries[name]), 2)
+                report[name]['sql_queries_max'] = max(self.queries[name])
+            if self.uncounted[name]:
+                # Streamed responses whose queries could not be counted
+                report[name]['sql_queries_uncounted'] = self.uncounted[name]
+        return report
+
+
+async def drive(scenario, sessions, duration):
+    """
+    Выполняет scenario(session, result) в цикле для каждой клиентской сессии,
+    пока не истечёт duration секунд. Возвращает сводку LoadResult.
+    """
+    result = LoadResult()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration
+
+    async def worker(session):
+        while loop.time() < deadline:
+            await scenario(session, result)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(session) for session in sessions))
+    return result.summary(time.perf_counter() - start)
+
+
+def client(base_url, **kwargs):
+    """
+    HTTP-клиент с отдельным хранилищем cookie для одной виртуальной сессии.
+    """
+    return httpx.AsyncClient(base_url=base_url, timeout=60, limits=httpx.Limits(max_connections=1), **kwargs)
+
+
+def run_command(command, cwd, env=None):
+    """
+    Выполняет вспомогательную команду (миграции, генерацию данных), завершаясь при ошибке.
+    """
+    completed = subprocess.run(command, cwd=cwd, env={**os.environ, **(env or {})}, capture_output=True, text=True)
+    if completed.returncode:
+        sys.exit(f'{" ".join(command)} failed:\n{completed.stdout}\n{completed.stderr}')
+    return completed.stdout
@@ -0,0 +1,6 @@
+"""
+Общий код приложений Flask, Django и FastAPI.
+
+Каталог корня репозитория добавляется в sys.path каждым приложением
+(Flask/app.py, Django/djangomike/settings.py, Fastapi/fastapi_mike/main.py).
+"""
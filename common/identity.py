@@ -0,0 +1,70 @@
+"""
+Кеш пользователей сессий: вместо запроса к базе данных на каждый запрос
+авторизованного пользователя используются записи, сохранённые в памяти
+процесса не дольше ttl секунд. Записи (CachedUser) определяет каждое приложение.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class IdentityCache:
+    """
+    Потокобезопасный LRU-кеш записей пользователей с ограничением времени жизни.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """
+        Возвращает запись пользователя или None, если её нет или она устарела.
+        """
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[1] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, user):
+        """
+        Сохраняет запись пользователя, вытесняя самую давно использованную при переполнении.
+        """
+        with self._lock:
+            self._entries[user.id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        """
+        Удаляет запись пользователя, например после изменения или удаления пользователя.
+        """
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """
+        Очищает кеш.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Текущие показатели кеша.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'size': len(self._entries), 'maxsize': self.maxsize, 'ttl_seconds': self.ttl,
+                    'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
+
@@ -0,0 +1,65 @@
+"""
+Метрики приложений в формате Prometheus: задержка, размер ответа и число
+выполняемых запросов по маршрутам, число и длительность SQL-запросов по
+маршрутам и видам запросов.
+
+Здесь определены сами метрики; сбор показателей к ним подключает каждое
+приложение в своём модуле metrics. При запуске нескольких рабочих процессов
+задайте переменную окружения PROMETHEUS_MULTIPROC_DIR (пустой каталог),
+чтобы /metrics суммировал показатели всех процессов.
+"""
+import os
+import re
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+# Upper bounds of the SQL duration histogram, in seconds
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency', ['method', 'route', 'status'],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'http_requests_in_flight', 'HTTP requests being processed', multiprocess_mode='livesum',
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes', 'HTTP response body size', ['method', 'route'], buckets=SIZE_BUCKETS,
+)
+QUERIES_PER_REQUEST = Histogram(
+    'db_queries_per_request', 'SQL queries executed per HTTP request', ['route'],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+)
+QUERY_DURATION = Histogram(
+    'db_query_duration_seconds', 'SQL query duration', ['route', 'statement'], buckets=QUERY_BUCKETS,
+)
+QUERY_ERRORS = Counter(
+    'db_query_errors_total', 'SQL queries that raised an error', ['route', 'statement'],
+)
+
+_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|TABLE)\s+"?(\w+)', re.IGNORECASE)
+
+
+def statement_label(statement):
+    """
+    Короткая метка SQL-запроса: вид запроса и первая таблица, например "SELECT task".
+    """
+    words = statement.split(None, 1)
+    if not words:
+        return 'EMPTY'
+    table = _TABLE.search(statement)
+    return f'{words[0].upper()} {table.group(1)}' if table else words[0].upper()
+
+
+def render_metrics():
+    """
+    Текст метрик в формате Prometheus и его тип содержимого.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,23 @@
+"""
+Разбор распределений для генераторов тестовых данных.
+"""
+
+
+def parse_weights(value, allowed):
+    """
+    Разбирает распределение вида 'planned=5,in_progress=3,completed=2' в словарь {статус: вес}.
+    Вызывает ValueError при некорректном весе или статусе, отсутствующем в allowed.
+    """
+    weights = {}
+    for item in value.split(','):
+        key, _, weight = item.partition('=')
+        try:
+            weights[key.strip()] = float(weight)
+        except ValueError:
+            raise ValueError(f'Некорректный вес в распределении: {item!r}') from None
+    unknown = set(weights) - set(allowed)
+    if unknown:
+        raise ValueError(f'Неизвестные статусы: {", ".join(sorted(unknown))}')
+    if not any(weight > 0 for weight in weights.values()):
+        raise ValueError('Хотя бы один статус должен иметь положительный вес')
+    return weights